@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+SADRN Packet Ingestion Benchmark
+Posts packets to dashboard/dashboard.py's /api/packet over real HTTP and reports packets/s
+ingested for each way of sending them:
+
+    single   one request per packet, new connection each (the old display_server)
+    session  one request per packet on a keep-alive connection
+    array    JSON arrays of --batch packets on a keep-alive connection
+    ndjson   NDJSON bodies of --batch packets on a keep-alive connection
+    stream   one long-lived chunked application/x-ndjson request (display_server --stream)
+
+    python benchmarks/bench_ingest.py --packets 5000 --batch 100
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'dashboard'))
+
+
+def make_packet(i):
+    return {'source': f'10.0.0.{i % 3 + 1}', 'destination': '10.0.0.100', 'sensor_type': 'water_level',
+            'value': i % 100, 'gateway': 'gw_a', 'priority': 'emergency' if i % 10 == 0 else 'normal'}
+
+
+def send_single(url, n, batch):
+    for i in range(n):
+        requests.post(url, json=make_packet(i), timeout=5)
+
+
+def send_session(url, n, batch):
+    session = requests.Session()
+    for i in range(n):
+        session.post(url, json=make_packet(i), timeout=5)
+
+
+def send_array(url, n, batch):
+    session = requests.Session()
+    for start in range(0, n, batch):
+        session.post(url, json=[make_packet(i) for i in range(start, min(n, start + batch))], timeout=5)
+
+
+def send_ndjson(url, n, batch):
+    session = requests.Session()
+    for start in range(0, n, batch):
+        body = ''.join(json.dumps(make_packet(i)) + '\n' for i in range(start, min(n, start + batch)))
+        session.post(url, data=body.encode(), headers={'Content-Type': 'application/x-ndjson'}, timeout=5)
+
+
+def send_stream(url, n, batch):
+    def lines():
+        for start in range(0, n, batch):
+            yield ''.join(json.dumps(make_packet(i)) + '\n' for i in range(start, min(n, start + batch))).encode()
+    requests.post(url, data=lines(), headers={'Content-Type': 'application/x-ndjson'}, timeout=30)
+
+
+MODES = {'single': send_single, 'session': send_session, 'array': send_array, 'ndjson': send_ndjson,
+         'stream': send_stream}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN packet ingestion benchmark')
+    parser.add_argument('--packets', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=100, help='Packets per array / NDJSON chunk')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--port', type=int, default=5097)
+    args = parser.parse_args()
+
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    import dashboard as backend
+    server = make_server('127.0.0.1', args.port, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{args.port}/api/packet'
+
+    print(f"{args.packets} packets per mode, batch {args.batch}")
+    for mode in args.modes.split(','):
+        # The per-packet modes get a tenth of the packets: they are orders of magnitude slower
+        n = args.packets // 10 if mode in ('single', 'session') else args.packets
+        before = backend.packets.seq
+        started = time.perf_counter()
+        MODES[mode](url, n, args.batch)
+        elapsed = time.perf_counter() - started
+        ingested = backend.packets.seq - before
+        print(f"  {mode:<8} {ingested:6} packets in {elapsed:6.2f}s  {ingested / elapsed:9.0f} packets/s"
+              f"{'' if ingested == n else f'  ({n - ingested} lost)'}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+SADRN State Contention Benchmark
+Runs packet ingestion and API reads against dashboard/dashboard.py at the same time, with a
+controller-sized topology in the state, and reports ingest packets/s, reads/s and read latency:
+
+    ingest   --writers threads posting JSON arrays of --batch packets to /api/packet
+    readers  --readers threads polling /api/state, /api/stats and /api/topology
+
+Readers serialise the whole topology per /api/state; with one lock around the state that
+held up every ingest batch. With immutable snapshots neither side waits for the other.
+
+    python benchmarks/bench_state.py --seconds 5 --writers 2 --readers 4 --nodes 2000
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'dashboard'))
+
+from utils.stream_stats import LatencyHistogram
+
+READ_PATHS = ('/api/state', '/api/stats', '/api/topology')
+
+
+def make_topology(nodes):
+    return {'nodes': [{'id': f's{i}', 'type': 'switch', 'battery': 100 - i % 100, 'dpid': i}
+                      for i in range(nodes)],
+            'edges': [{'source': f's{i}', 'target': f's{(i + 1) % nodes}', 'port': i % 48}
+                      for i in range(nodes)]}
+
+
+def make_batch(start, batch):
+    return [{'source': f'10.0.0.{i % 3 + 1}', 'destination': '10.0.0.100', 'sensor_type': 'water_level',
+             'value': i % 100, 'gateway': 'gw_a', 'priority': 'emergency' if i % 10 == 0 else 'normal'}
+            for i in range(start, start + batch)]
+
+
+def writer(client, batch, deadline, latency):
+    sent = 0
+    while time.perf_counter() < deadline:
+        packets = make_batch(sent, batch)
+        started = time.perf_counter()
+        client.post('/api/packet', json=packets)
+        latency.append((time.perf_counter() - started) * 1000)
+        sent += batch
+
+
+def reader(client, deadline, latency):
+    i = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        client.get(READ_PATHS[i % len(READ_PATHS)])
+        latency.append((time.perf_counter() - started) * 1000)
+        i += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN state contention benchmark')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=50, help='Packets per ingest request')
+    parser.add_argument('--nodes', type=int, default=2000, help='Switches in the seeded topology')
+    args = parser.parse_args()
+
+    import dashboard as backend
+    backend.store.set(topology=make_topology(args.nodes))
+
+    writes, reads = [[] for _ in range(args.writers)], [[] for _ in range(args.readers)]
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=writer, args=(backend.app.test_client(), args.batch, deadline, latency))
+               for latency in writes]
+    threads += [threading.Thread(target=reader, args=(backend.app.test_client(), deadline, latency))
+                for latency in reads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"{args.writers} writers x {args.batch} packets, {args.readers} readers, "
+          f"{args.nodes}-switch topology, {args.seconds:g}s")
+    for name, latencies, scale, unit in (('ingest', writes, args.batch, 'packets/s'),
+                                         ('reads', reads, 1, 'requests/s')):
+        histogram = LatencyHistogram()
+        for latency in latencies:
+            for value in latency:
+                histogram.record(value)
+        summary = histogram.summary()
+        print(f"  {name:<7} {summary['count'] * scale / args.seconds:9.0f} {unit:<10}  "
+              f"p50 {summary['p50']} ms  p99 {summary['p99']} ms  max {summary['max']} ms")
+
+
+if __name__ == '__main__':
+    main()
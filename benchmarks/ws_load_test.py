@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+SADRN WebSocket Load Test
+Opens thousands of Socket.IO clients against a dashboard backend, triggers a broadcast
+through the REST API and measures how long every client takes to receive it.
+
+    # spawn the React backend in eventlet mode, ramp to 1k and 5k clients
+    python benchmarks/ws_load_test.py --target react --spawn eventlet --clients 1000,5000
+    # compare against threading mode / the dashboard/app.py bridge
+    python benchmarks/ws_load_test.py --target react --spawn threading --clients 500,1000
+    python benchmarks/ws_load_test.py --target dashboard --spawn eventlet --clients 1000,5000
+    # or point it at a running server
+    python benchmarks/ws_load_test.py --target dashboard --url http://127.0.0.1:5001 --clients 1000
+
+Clients are plain websocket Engine.IO v4 connections on eventlet green threads, spread
+over --workers processes so the load generator is not the bottleneck.
+"""
+import os
+import re
+import sys
+import time
+import base64
+import struct
+import argparse
+import warnings
+import subprocess
+import multiprocessing
+from urllib.parse import urlparse
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Broadcast trigger per backend: REST call with a marker value, and where it shows up in the emit
+TARGETS = {
+    'react': {
+        'script': os.path.join(ROOT, 'react-dashboard', 'backend', 'app.py'), 'port': 5000,
+        'method': 'PUT', 'path': '/api/switches/s1/battery', 'body': lambda v: {'battery': v},
+        'marker': rb'"battery":\s*(\d+)[,}]',
+    },
+    'dashboard': {
+        'script': os.path.join(ROOT, 'dashboard', 'app.py'), 'port': 5001,
+        'method': 'POST', 'path': '/api/battery/s1', 'body': lambda v: {'level': v},
+        'marker': rb'"level":\s*(\d+)[,}]',
+    },
+}
+MARKERS = range(41, 100)  # battery levels that never change routing bands
+CONNECT_CONCURRENCY = 50  # per worker; stays under the listen backlog
+
+
+# Minimal websocket client (RFC 6455) on eventlet green sockets
+class WebSocket:
+    def __init__(self, sock, buf):
+        self.sock = sock
+        self.buf = bytearray(buf)
+
+    @classmethod
+    def connect(cls, host, port, path):
+        import eventlet
+        sock = eventlet.connect((host, port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall(f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n'
+                     f'Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n'.encode())
+        buf = b''
+        while b'\r\n\r\n' not in buf:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError('closed during handshake')
+            buf += chunk
+        head, rest = buf.split(b'\r\n\r\n', 1)
+        if b' 101 ' not in head.split(b'\r\n', 1)[0]:
+            raise ConnectionError(head.split(b'\r\n', 1)[0].decode(errors='replace'))
+        return cls(sock, rest)
+
+    def _read(self, n):
+        while len(self.buf) < n:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError('closed')
+            self.buf += chunk
+        data = bytes(self.buf[:n])
+        del self.buf[:n]
+        return data
+
+    def send(self, text, opcode=0x1):
+        data = text.encode() if isinstance(text, str) else text
+        mask = os.urandom(4)
+        if len(data) < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | len(data))
+        else:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, len(data))
+        self.sock.sendall(header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(data)))
+
+    def recv(self):
+        message = b''
+        while True:
+            b0, b1 = self._read(2)
+            opcode, length = b0 & 0x0F, b1 & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', self._read(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', self._read(8))[0]
+            payload = self._read(length)
+            if opcode == 0x8:
+                raise ConnectionError('server closed')
+            if opcode == 0x9:
+                self.send(payload, opcode=0xA)
+                continue
+            message += payload
+            if b0 & 0x80:
+                return message
+
+
+def open_client(host, port, pattern, clients):
+    """Engine.IO open + Socket.IO connect; then record every marker seen on a green thread"""
+    import eventlet
+    for _ in range(3):
+        try:
+            ws = WebSocket.connect(host, port, '/socket.io/?EIO=4&transport=websocket')
+            if not ws.recv().startswith(b'0'):
+                raise ConnectionError('no engine.io open packet')
+            ws.send('40')
+            while not ws.recv().startswith(b'40'):
+                pass
+            break
+        except (OSError, ConnectionError):
+            eventlet.sleep(0.2)
+    else:
+        return False
+
+    client = {'records': [], 'alive': True}
+    clients.append(client)
+
+    def read_loop():
+        try:
+            while True:
+                msg = ws.recv()
+                if msg == b'2':
+                    ws.send('3')
+                elif msg[:2] == b'42':
+                    now = time.time()
+                    for value in pattern.findall(msg):
+                        client['records'].append((int(value), now))
+        except (OSError, ConnectionError):
+            client['alive'] = False
+
+    eventlet.spawn(read_loop)
+    return True
+
+
+def worker(conn, host, port, marker):
+    """Load generator process: opens clients on request and reports what they received"""
+    warnings.filterwarnings('ignore', message=r'\s*Eventlet is deprecated')
+    import eventlet
+    import eventlet.hubs
+    pattern = re.compile(marker)
+    clients = []
+    while True:
+        eventlet.hubs.trampoline(conn.fileno(), read=True)  # don't block the hub on the pipe
+        cmd, arg = conn.recv()
+        if cmd == 'connect':
+            pool = eventlet.GreenPool(CONNECT_CONCURRENCY)
+            opened = list(pool.imap(lambda _: open_client(host, port, pattern, clients), range(arg)))
+            conn.send((sum(opened), len(opened) - sum(opened)))
+        elif cmd == 'collect':
+            conn.send(([c['records'] for c in clients], sum(1 for c in clients if not c['alive'])))
+            for c in clients:
+                c['records'] = []
+        elif cmd == 'stop':
+            return
+
+
+def proc_usage(pid):
+    """(rss MB, cpu seconds) of a process from /proc"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith('VmRSS')) / 1024
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return rss, (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, StopIteration):
+        return None, None
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def spawn_server(target, mode, port):
+    env = dict(os.environ, SADRN_ASYNC_MODE=mode, FLASK_PORT=str(port), SADRN_BATTERY_DRAIN='0',
+               PYTHONWARNINGS='ignore')
+    script = TARGETS[target]['script']
+    server = subprocess.Popen([sys.executable, script], cwd=os.path.dirname(script), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            requests.get(f'http://127.0.0.1:{port}/socket.io/?EIO=4&transport=polling', timeout=1)
+            return server
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.kill()
+    sys.exit(f'{target} backend did not start on port {port}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN websocket load test')
+    parser.add_argument('--target', choices=TARGETS, default='react')
+    parser.add_argument('--url', help='Running server (default: spawn one)')
+    parser.add_argument('--spawn', choices=('eventlet', 'threading'), default='eventlet',
+                        help='Async mode for the spawned server')
+    parser.add_argument('--port', type=int, default=5150, help='Port for the spawned server')
+    parser.add_argument('--clients', default='1000,5000', help='Comma-separated ramp of client counts')
+    parser.add_argument('--rounds', type=int, default=10, help='Broadcasts measured per step')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between broadcasts')
+    parser.add_argument('--workers', type=int, default=4, help='Load generator processes')
+    parser.add_argument('--slo', type=float, default=1000, help='p99 latency (ms) a step must meet to count as served')
+    args = parser.parse_args()
+
+    target = TARGETS[args.target]
+    server = None
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        server = spawn_server(args.target, args.spawn, args.port)
+        url = f'http://127.0.0.1:{args.port}'
+    host, port = urlparse(url).hostname, urlparse(url).port or 80
+
+    ctx = multiprocessing.get_context('spawn')
+    pipes, procs = [], []
+    for _ in range(args.workers):
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=worker, args=(child, host, port, target['marker']), daemon=True)
+        proc.start()
+        pipes.append(parent)
+        procs.append(proc)
+
+    mode = f'spawned, {args.spawn}' if server else 'external'
+    print(f"{args.target} backend at {url} ({mode}), {args.workers} load workers, "
+          f"{args.rounds} broadcasts/step every {args.interval}s")
+    print(f"{'clients':>8} {'failed':>7} {'dropped':>8} {'delivered':>10} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8} {'srv MB':>7} {'srv CPU':>8}")
+
+    connected, served, round_no = 0, 0, 0
+    try:
+        for step in (int(n) for n in args.clients.split(',')):
+            need = step - connected
+            failed = 0
+            if need > 0:
+                shares = [need // args.workers + (i < need % args.workers) for i in range(args.workers)]
+                for pipe, share in zip(pipes, shares):
+                    pipe.send(('connect', share))
+                for pipe in pipes:
+                    ok, bad = pipe.recv()
+                    connected += ok
+                    failed += bad
+            time.sleep(1)
+            for pipe in pipes:  # drop the connect-time snapshots
+                pipe.send(('collect', None))
+                pipe.recv()
+
+            sent = []
+            cpu_start = proc_usage(server.pid)[1] if server else None
+            wall_start = time.time()
+            for _ in range(args.rounds):
+                value = MARKERS[round_no % len(MARKERS)]
+                round_no += 1
+                sent.append((value, time.time()))
+                requests.request(target['method'], url + target['path'], json=target['body'](value), timeout=30)
+                time.sleep(args.interval)
+            time.sleep(min(5.0, args.interval * 2))
+
+            latencies, delivered, dropped = [], 0, 0
+            for pipe in pipes:
+                pipe.send(('collect', None))
+            for pipe in pipes:
+                records, dead = pipe.recv()
+                dropped += dead
+                for client in records:
+                    for value, t0 in sent:
+                        t = next((t for v, t in client if v == value and t >= t0), None)
+                        if t is not None:
+                            latencies.append((t - t0) * 1000)
+                            delivered += 1
+            latencies.sort()
+            expected = connected * len(sent)
+            ratio = delivered / expected if expected else 0
+
+            rss, cpu_end = proc_usage(server.pid) if server else (None, None)
+            cpu = (f"{(cpu_end - cpu_start) / (time.time() - wall_start) * 100:7.0f}%"
+                   if cpu_end is not None else f"{'-':>8}")
+            p99 = percentile(latencies, 0.99)
+            fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8}"
+            print(f"{connected:>8} {failed:>7} {dropped:>8} {ratio:>9.1%} {fmt(percentile(latencies, 0.5))} "
+                  f"{fmt(percentile(latencies, 0.95))} {fmt(p99)} {fmt(latencies[-1] if latencies else None)} "
+                  f"{rss if rss is None else round(rss):>7} {cpu}")
+            if ratio >= 0.999 and p99 is not None and p99 <= args.slo:
+                served = connected
+            if server and server.poll() is not None:
+                print('server exited')
+                break
+    finally:
+        for pipe in pipes:
+            try:
+                pipe.send(('stop', None))
+            except OSError:
+                pass
+        for proc in procs:
+            proc.join(timeout=2)
+            if proc.is_alive():
+                proc.terminate()
+        if server:
+            server.terminate()
+            server.wait()
+    print(f"largest step served (>=99.9% delivered, p99 <= {args.slo:g} ms): {served} clients")
+
+
+if __name__ == '__main__':
+    main()
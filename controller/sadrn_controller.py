@@ -16,6 +16,7 @@ from ryu.app.wsgi import ControllerBase, WSGIApplication, route
 from webob import Response
 import networkx as nx
 import json
+import hashlib
 import logging
 import time
 from collections import defaultdict
@@ -261,6 +262,29 @@ class SADRNController(app_manager.RyuApp):
             return True
         return False
     
+    def apply_commands(self, commands):
+        """One batch from the dashboard's command queue: {'battery': {switch: level},
+        'emergency': {host: {'status': bool, 'disaster_type': str}}}. Every item is checked
+        before any is applied, so a malformed batch (ValueError) changes nothing"""
+        battery, emergency = commands.get('battery', {}), commands.get('emergency', {})
+        if not isinstance(battery, dict) or not isinstance(emergency, dict):
+            raise ValueError('battery and emergency must be objects')
+        levels = {}
+        for switch_id, level in battery.items():
+            if not str(switch_id).isdigit() or isinstance(level, bool) or not isinstance(level, (int, float)):
+                raise ValueError(f'Invalid battery command {switch_id}: {level!r}')
+            levels[int(switch_id)] = level
+        for host, body in emergency.items():
+            if not isinstance(body, dict):
+                raise ValueError(f'Invalid emergency command {host}: {body!r}')
+        
+        applied = {}
+        for switch_id, level in levels.items():
+            applied[f's{switch_id}'] = self.set_battery_level(switch_id, level)
+        for host, body in emergency.items():
+            applied[host] = self.set_emergency_status(host, bool(body.get('status', False)), body.get('disaster_type'))
+        return applied
+    
     def get_topology_info(self):
         nodes, edges = [], []
         for dpid in self.topology_graph.nodes():
@@ -292,6 +316,17 @@ class SADRNController(app_manager.RyuApp):
         return paths
 
 
+def json_response(req, data):
+    """JSON GET response with an ETag; 304 without a body when the client already has it"""
+    body = json.dumps(data, sort_keys=True).encode('utf-8')
+    etag = hashlib.md5(body).hexdigest()
+    if etag in req.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    response = Response(content_type='application/json; charset=utf-8', body=body)
+    response.etag = etag
+    return response
+
+
 class SADRNRestController(ControllerBase):
     def __init__(self, req, link, data, **config):
         super(SADRNRestController, self).__init__(req, link, data, **config)
@@ -299,7 +334,7 @@ class SADRNRestController(ControllerBase):
     
     @route('sadrn', '/sadrn/topology', methods=['GET'])
     def get_topology(self, req, **kwargs):
-        return Response(content_type='application/json; charset=utf-8', body=json.dumps(self.sadrn_controller.get_topology_info()).encode('utf-8'))
+        return json_response(req, self.sadrn_controller.get_topology_info())
     
     @route('sadrn', '/sadrn/battery/{switch_id}', methods=['POST'])
     def set_battery(self, req, switch_id, **kwargs):
@@ -319,23 +354,31 @@ class SADRNRestController(ControllerBase):
         except Exception as e:
             return Response(content_type='application/json; charset=utf-8', body=json.dumps({'error': str(e)}).encode('utf-8'), status=400)
     
+    @route('sadrn', '/sadrn/commands', methods=['POST'])
+    def apply_commands(self, req, **kwargs):
+        try:
+            applied = self.sadrn_controller.apply_commands(json.loads(req.body))
+            return Response(content_type='application/json; charset=utf-8', body=json.dumps({'success': applied}).encode('utf-8'))
+        except Exception as e:
+            return Response(content_type='application/json; charset=utf-8', body=json.dumps({'error': str(e)}).encode('utf-8'), status=400)
+    
     @route('sadrn', '/sadrn/paths', methods=['GET'])
     def get_paths(self, req, **kwargs):
-        return Response(content_type='application/json; charset=utf-8', body=json.dumps(self.sadrn_controller.get_paths_to_display()).encode('utf-8'))
+        return json_response(req, self.sadrn_controller.get_paths_to_display())
     
     @route('sadrn', '/sadrn/stats', methods=['GET'])
     def get_stats(self, req, **kwargs):
         stats = self.sadrn_controller.packet_stats.copy()
         stats['battery_levels'] = self.sadrn_controller.battery_levels.copy()
         stats['emergency_status'] = self.sadrn_controller.emergency_status.copy()
-        return Response(content_type='application/json; charset=utf-8', body=json.dumps(stats).encode('utf-8'))
+        return json_response(req, stats)
     
     @route('sadrn', '/sadrn/battery', methods=['GET'])
     def get_all_battery(self, req, **kwargs):
-        return Response(content_type='application/json; charset=utf-8', body=json.dumps(self.sadrn_controller.battery_levels).encode('utf-8'))
+        return json_response(req, self.sadrn_controller.battery_levels)
     
     @route('sadrn', '/sadrn/emergency', methods=['GET'])
     def get_all_emergency(self, req, **kwargs):
-        return Response(content_type='application/json; charset=utf-8', body=json.dumps({'status': self.sadrn_controller.emergency_status, 'types': self.sadrn_controller.disaster_types}).encode('utf-8'))
+        return json_response(req, {'status': self.sadrn_controller.emergency_status, 'types': self.sadrn_controller.disaster_types})
 
 app = SADRNController
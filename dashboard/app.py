@@ -4,23 +4,47 @@ SADRN - Flask Backend API Server
 Bridge between React Dashboard, Ryu Controller, and Mininet hosts
 """
 
+import os
+
+# SADRN_ASYNC_MODE=eventlet: green threads per websocket client instead of OS threads.
+# Must patch before requests/socket/threading are imported.
+ASYNC_MODE = os.environ.get('SADRN_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-import requests
 import json
 import socket
 import threading
 import time
-import os
+from upstream import Upstream, SWRCache, fan_out
+from subscriptions import Subscriptions
+from command_queue import CommandQueue
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 RYU_URL = os.environ.get('RYU_CONTROLLER_URL', 'http://127.0.0.1:8080')
 DISPLAY_URL = os.environ.get('DISPLAY_NODE_URL', 'http://10.0.0.100:8080')
+MAX_CLIENTS = int(os.environ.get('SADRN_MAX_CLIENTS', 10000))
+ryu = Upstream('ryu', RYU_URL)
+display = Upstream('display', DISPLAY_URL)
+ryu_cache = SWRCache(ryu)
+display_cache = SWRCache(display)
+commands = CommandQueue(Upstream('ryu-commands', RYU_URL), on_sent=lambda batch: ryu_cache.expire('/sadrn/topology', '/sadrn/paths'))
 CONTROL_PORTS = {'h1': ('10.0.0.1', 6001), 'h2': ('10.0.0.2', 6002), 'h3': ('10.0.0.3', 6003)}
+SENSOR_ZONES = {'water_a1': ('flood', 'gw_a'), 'rain_a2': ('flood', 'gw_a'),
+                'seismic_b1': ('earthquake', 'gw_b'), 'tilt_b2': ('earthquake', 'gw_b'),
+                'temp_c1': ('fire', 'gw_c'), 'smoke_c2': ('fire', 'gw_c')}
+# Zone and gateway whose direct path runs through a switch (zone switch and its core switch)
+SWITCH_ZONES = {'s1': ('flood', 'gw_a'), 's4': ('flood', 'gw_a'), 's2': ('earthquake', 'gw_b'),
+                's5': ('earthquake', 'gw_b'), 's3': ('fire', 'gw_c'), 's6': ('fire', 'gw_c')}
+subscriptions = Subscriptions(socketio, ('live_update', 'battery_update', 'emergency_update'),
+                              filterable=('live_update', 'battery_update', 'emergency_update'))
 
 state = {
     'battery_levels': {'s1': 100, 's2': 100, 's3': 100, 's4': 100, 's5': 100, 's6': 100},
@@ -134,31 +158,36 @@ def get_mock_paths():
     return paths
 
 
+def cached_response(cache, path, fallback, timeout=2):
+    """JSON from the cache, with the data's age in seconds (Age, X-Data-Age) and its source"""
+    value, age, source = cache.get(path, fallback, timeout)
+    response = jsonify(value)
+    response.headers['Age'] = str(int(age))
+    response.headers['X-Data-Age'] = f'{age:.3f}'
+    response.headers['X-Data-Source'] = source
+    return response
+
+
 @app.route('/api/topology', methods=['GET'])
 def api_topology():
-    try:
-        return jsonify(requests.get(f'{RYU_URL}/sadrn/topology', timeout=5).json())
-    except:
-        return jsonify(get_mock_topology())
+    return cached_response(ryu_cache, '/sadrn/topology', get_mock_topology, timeout=5)
 
 
 @app.route('/api/paths', methods=['GET'])
 def api_paths():
-    try:
-        return jsonify(requests.get(f'{RYU_URL}/sadrn/paths', timeout=5).json())
-    except:
-        return jsonify(get_mock_paths())
+    return cached_response(ryu_cache, '/sadrn/paths', get_mock_paths, timeout=5)
 
 
 @app.route('/api/battery/<switch_id>', methods=['POST'])
 def api_set_battery(switch_id):
-    level = max(1, min(100, request.json.get('level', 100)))
-    state['battery_levels'][switch_id] = level
+    if switch_id not in state['battery_levels']:
+        return jsonify({'success': False, 'error': f'Unknown switch {switch_id}'}), 404
     try:
-        requests.post(f'{RYU_URL}/sadrn/battery/{switch_id[1]}', json={'level': level}, timeout=2)
-    except:
-        pass
-    socketio.emit('battery_update', {'switch': switch_id, 'level': level})
+        _, level = commands.put('battery', switch_id, (request.get_json(silent=True) or {}).get('level', 100))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    state['battery_levels'][switch_id] = level
+    emit_battery(switch_id, level)
     return jsonify({'success': True, 'switch': switch_id, 'level': level})
 
 
@@ -169,18 +198,40 @@ def api_get_battery():
 
 @app.route('/api/emergency/<host_id>', methods=['POST'])
 def api_set_emergency(host_id):
-    data = request.json
-    enabled, dtype = data.get('enabled', False), data.get('disaster_type')
-    state['emergency_status'][host_id] = enabled
-    state['disaster_types'][host_id] = dtype if enabled else None
+    if host_id not in state['emergency_status']:
+        return jsonify({'success': False, 'error': f'Unknown host {host_id}'}), 404
+    data = request.get_json(silent=True) or {}
     try:
-        requests.post(f'{RYU_URL}/sadrn/emergency/{host_id}', json={'status': enabled, 'disaster_type': dtype}, timeout=2)
-    except:
-        pass
-    socketio.emit('emergency_update', {'host': host_id, 'emergency': enabled, 'disaster_type': dtype})
+        _, command = commands.put('emergency', host_id, {'status': data.get('enabled', False),
+                                                         'disaster_type': data.get('disaster_type')})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    enabled, dtype = command['status'], command['disaster_type']
+    state['emergency_status'][host_id] = enabled
+    state['disaster_types'][host_id] = dtype
+    emit_emergency(host_id, enabled, dtype)
     return jsonify({'success': True, 'host': host_id, 'emergency': enabled})
 
 
+def sensor_topics(sensor_id):
+    zone, gateway = SENSOR_ZONES.get(sensor_id, ('unknown', 'unknown'))
+    return (f'zone:{zone}', f'gateway:{gateway}', f'sensor:{sensor_id}')
+
+
+def switch_topics(switch_id):
+    zone, gateway = SWITCH_ZONES.get(switch_id, ('unknown', 'unknown'))
+    return (f'zone:{zone}', f'gateway:{gateway}')
+
+
+def emit_battery(switch_id, level):
+    subscriptions.emit('battery_update', {'switch': switch_id, 'level': level}, topics=switch_topics(switch_id))
+
+
+def emit_emergency(host_id, enabled, dtype):
+    subscriptions.emit('emergency_update', {'host': host_id, 'emergency': enabled, 'disaster_type': dtype},
+                       topics=sensor_topics(host_id))
+
+
 @app.route('/api/emergency', methods=['GET'])
 def api_get_emergency():
     return jsonify({'status': state['emergency_status'], 'types': state['disaster_types']})
@@ -188,37 +239,39 @@ def api_get_emergency():
 
 @app.route('/api/display/stats', methods=['GET'])
 def api_display_stats():
-    try:
-        return jsonify(requests.get(f'{DISPLAY_URL}/stats', timeout=2).json())
-    except:
-        return jsonify({'total_packets': 0, 'normal_packets': 0, 'emergency_packets': 0})
+    return cached_response(display_cache, '/stats', {'total_packets': 0, 'normal_packets': 0, 'emergency_packets': 0})
 
 
 @app.route('/api/display/packets', methods=['GET'])
 def api_display_packets():
-    try:
-        return jsonify(requests.get(f'{DISPLAY_URL}/packets', timeout=2).json())
-    except:
-        return jsonify([])
+    return cached_response(display_cache, '/packets', [])
 
 
 @app.route('/api/state', methods=['GET'])
 def api_state():
-    topo = get_mock_topology()
-    try:
-        topo = requests.get(f'{RYU_URL}/sadrn/topology', timeout=2).json()
-    except:
-        pass
-    return jsonify({
+    topo, age, source = ryu_cache.get('/sadrn/topology', get_mock_topology)
+    response = jsonify({
         'topology': topo, 'paths': get_mock_paths(), 'battery_levels': state['battery_levels'],
         'emergency_status': state['emergency_status'], 'disaster_types': state['disaster_types'],
-        'simulation_running': state['simulation_running']
+        'simulation_running': state['simulation_running'], 'topology_age': round(age, 3)
     })
+    response.headers['Age'] = str(int(age))
+    response.headers['X-Data-Age'] = f'{age:.3f}'
+    response.headers['X-Data-Source'] = source
+    return response
+
+
+@app.route('/api/upstreams', methods=['GET'])
+def api_upstreams():
+    upstreams = {u.name: {**u.status(), 'cache': c.status()} for u, c in ((ryu, ryu_cache), (display, display_cache))}
+    upstreams['ryu']['commands'] = commands.status()
+    return jsonify(upstreams)
 
 
 @socketio.on('connect')
 def on_connect():
     state['connected_clients'] += 1
+    subscriptions.subscribe(request.sid)
     emit('state_update', {'battery_levels': state['battery_levels'], 'emergency_status': state['emergency_status'],
                           'disaster_types': state['disaster_types'], 'simulation_running': state['simulation_running']})
 
@@ -226,19 +279,35 @@ def on_connect():
 @socketio.on('disconnect')
 def on_disconnect():
     state['connected_clients'] -= 1
+    subscriptions.drop(request.sid)
+
+
+@socketio.on('subscribe')
+def on_subscribe(data=None):
+    """{'events': [...], 'zones': [...], 'gateways': [...], 'sensors': [...]}; empty for everything"""
+    try:
+        rooms = subscriptions.subscribe(request.sid, data)
+    except ValueError as e:
+        emit('subscription_error', {'error': str(e)})
+        return
+    emit('subscribed', {'rooms': sorted(rooms)})
 
 
 @socketio.on('set_battery')
 def ws_battery(data):
+    """Applied and broadcast at once; the controller gets the latest level in the next batch.
+    Returns the acknowledgement to the client's callback"""
     switch_id = data.get('switch')
     level = data.get('level', 100)
-    if switch_id in state['battery_levels']:
-        state['battery_levels'][switch_id] = level
-        try:
-            requests.post(f'{RYU_URL}/sadrn/battery/{switch_id[1]}', json={'level': level}, timeout=1)
-        except:
-            pass
-        socketio.emit('battery_update', {'switch': switch_id, 'level': level})
+    if switch_id not in state['battery_levels']:
+        return {'success': False, 'error': f'Unknown switch {switch_id}'}
+    try:
+        _, level = commands.put('battery', switch_id, level)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+    state['battery_levels'][switch_id] = level
+    emit_battery(switch_id, level)
+    return {'success': True, 'switch': switch_id, 'level': level}
 
 
 @socketio.on('trigger_disaster')
@@ -246,14 +315,17 @@ def ws_disaster(data):
     host_id = data.get('host')
     enabled = data.get('enabled', True)
     dtype = data.get('disaster_type')
-    if host_id in state['emergency_status']:
-        state['emergency_status'][host_id] = enabled
-        state['disaster_types'][host_id] = dtype if enabled else None
-        try:
-            requests.post(f'{RYU_URL}/sadrn/emergency/{host_id}', json={'status': enabled, 'disaster_type': dtype}, timeout=1)
-        except:
-            pass
-        socketio.emit('emergency_update', {'host': host_id, 'emergency': enabled, 'disaster_type': dtype})
+    if host_id not in state['emergency_status']:
+        return {'success': False, 'error': f'Unknown host {host_id}'}
+    try:
+        _, command = commands.put('emergency', host_id, {'status': enabled, 'disaster_type': dtype})
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+    enabled, dtype = command['status'], command['disaster_type']
+    state['emergency_status'][host_id] = enabled
+    state['disaster_types'][host_id] = dtype
+    emit_emergency(host_id, enabled, dtype)
+    return {'success': True, 'host': host_id, 'emergency': enabled}
 
 
 def broadcaster():
@@ -261,13 +333,11 @@ def broadcaster():
         time.sleep(2)
         if state['connected_clients'] > 0:
             try:
-                stats, packets = {}, []
-                try:
-                    stats = requests.get(f'{DISPLAY_URL}/stats', timeout=1).json()
-                    packets = requests.get(f'{DISPLAY_URL}/packets', timeout=1).json()
-                except:
-                    pass
-                socketio.emit('live_update', {'display_stats': stats, 'recent_packets': packets[-10:], 'paths': get_mock_paths()})
+                (stats, age, _), (packets, _, _) = fan_out(lambda: display_cache.get('/stats', {}, timeout=1),
+                                                           lambda: display_cache.get('/packets', [], timeout=1))
+                subscriptions.emit_partitioned('live_update', {'display_stats': stats, 'recent_packets': packets[-10:],
+                                                               'paths': get_mock_paths(), 'data_age': round(age, 3)},
+                                               'paths', sensor_topics)
             except:
                 pass
 
@@ -276,5 +346,8 @@ threading.Thread(target=broadcaster, daemon=True).start()
 
 if __name__ == '__main__':
     port = int(os.environ.get('FLASK_PORT', 5001))
-    print(f"SADRN Dashboard API on port {port}")
-    socketio.run(app, allow_unsafe_werkzeug=True, host='0.0.0.0', port=port, debug=False)
+    print(f"SADRN Dashboard API on port {port} ({ASYNC_MODE})")
+    if ASYNC_MODE == 'eventlet':
+        socketio.run(app, host='0.0.0.0', port=port, debug=False, max_size=MAX_CLIENTS)
+    else:
+        socketio.run(app, allow_unsafe_werkzeug=True, host='0.0.0.0', port=port, debug=False)
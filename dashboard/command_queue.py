@@ -0,0 +1,130 @@
+"""
+SADRN Command Queue - coalesced, batched writes to the Ryu controller
+"""
+import math
+import os
+import threading
+import time
+
+COMMAND_WINDOW = float(os.environ.get('SADRN_COMMAND_WINDOW_MS', 50)) / 1000  # wait for more commands before sending
+COMMAND_RETRY = float(os.environ.get('SADRN_COMMAND_RETRY', 1))  # seconds before resending a failed batch
+
+
+def battery_command(switch_id, level):
+    """('3', 40) from 's3' or '3' and a number, clamped to 1-100 like the controller"""
+    switch = str(switch_id)
+    switch = switch[1:] if switch.startswith('s') else switch
+    if not switch.isdigit():
+        raise ValueError(f'Invalid switch {switch_id}')
+    if isinstance(level, bool):
+        raise ValueError(f'Invalid battery level {level!r}')
+    try:
+        level = float(level)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid battery level {level!r}')
+    if not math.isfinite(level):
+        raise ValueError(f'Invalid battery level {level!r}')
+    return switch, max(1, min(100, round(level)))
+
+
+def emergency_command(host, body):
+    """(host, {'status': bool, 'disaster_type': str or None}); ValueError otherwise"""
+    if not isinstance(host, str) or not host:
+        raise ValueError(f'Invalid host {host!r}')
+    if not isinstance(body, dict):
+        raise ValueError(f'Invalid emergency command {body!r}')
+    status, disaster_type = bool(body.get('status')), body.get('disaster_type')
+    if disaster_type is not None and not isinstance(disaster_type, str):
+        raise ValueError(f'Invalid disaster type {disaster_type!r}')
+    return host, {'status': status, 'disaster_type': disaster_type if status else None}
+
+
+COMMANDS = {'battery': battery_command, 'emergency': emergency_command}
+
+
+class CommandQueue:
+    """Socket.IO and REST handlers put() a command and return at once; one worker thread
+    sends them to the controller. Commands for the same (kind, key) - a switch's battery
+    level, a host's emergency state - collapse to the latest value while they wait, so a
+    dragged slider costs one controller write (and one path_cache clear) per window instead
+    of one per event. Each send is one POST of {kind: {key: value}}.
+
+    put() checks and converts each command, so the controller only sees valid batches. A
+    batch it rejects anyway (4xx) is dropped; one that does not get through (unreachable,
+    timeout, 5xx) is kept, under any newer values put since, and resent after `retry`.
+    Give the queue its own Upstream: its failures then never open the read path's breaker."""
+
+    def __init__(self, upstream, path='/sadrn/commands', on_sent=None, window=COMMAND_WINDOW,
+                 retry=COMMAND_RETRY):
+        self.upstream = upstream
+        self.path = path
+        self.on_sent = on_sent
+        self.window = window
+        self.retry = retry
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.pending = {}  # kind -> {key: latest value}
+        self.worker = None
+        self.queued = self.coalesced = self.batches = self.sent = self.failures = self.rejected = 0
+
+    def put(self, kind, key, value):
+        """Queue a command; returns the (key, value) queued. ValueError for an invalid one"""
+        if kind not in COMMANDS:
+            raise ValueError(f'Unknown command {kind}')
+        key, value = COMMANDS[kind](key, value)
+        with self.lock:
+            commands = self.pending.setdefault(kind, {})
+            self.coalesced += key in commands
+            commands[key] = value
+            self.queued += 1
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+        self.ready.set()
+        return key, value
+
+    def take(self):
+        with self.lock:
+            batch, self.pending = self.pending, {}
+            self.ready.clear()
+        return batch
+
+    def requeue(self, batch):
+        with self.lock:
+            for kind, commands in batch.items():
+                self.pending.setdefault(kind, {})
+                self.pending[kind] = {**commands, **self.pending[kind]}
+
+    def send(self, batch):
+        """POST one batch; False if it should be retried"""
+        status, _ = self.upstream.call('POST', self.path, json=batch)
+        count = sum(len(commands) for commands in batch.values())
+        with self.lock:
+            if status is None or status >= 500:
+                self.failures += 1
+                return False
+            if status >= 400:
+                self.rejected += count
+                return True
+            self.batches += 1
+            self.sent += count
+        if self.on_sent:
+            self.on_sent(batch)
+        return True
+
+    def run(self):
+        while True:
+            self.ready.wait()
+            time.sleep(self.window)  # let the rest of a burst arrive
+            batch = self.take()
+            if batch and not self.send(batch):
+                self.requeue(batch)
+                time.sleep(self.retry)
+                self.ready.set()
+
+    def status(self):
+        with self.lock:
+            return {'pending': sum(len(commands) for commands in self.pending.values()), 'queued': self.queued,
+                    'coalesced': self.coalesced, 'batches': self.batches, 'sent': self.sent,
+                    'rejected': self.rejected, 'failures': self.failures,
+                    'breaker': self.upstream.breaker.status()['state']}
@@ -8,10 +8,22 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from datetime import datetime
+from collections import Counter
+from functools import partial
+from packet_stream import PacketStream
+from upstream import Upstream, fan_out
+from subscriptions import Subscriptions
+from state_store import StateStore
+from command_queue import CommandQueue
 import threading
-import requests
 import json
+import math
 import time
+import os
+import io
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.stream_stats import StreamStats
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -19,15 +31,26 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
 # Configuration
 CONTROLLER_URL = 'http://localhost:8080'
+PACKET_BUFFER = int(os.environ.get('SADRN_PACKET_BUFFER', 1000))  # packets kept for cursors to resume from
+PACKET_BACKLOG = int(os.environ.get('SADRN_PACKET_BACKLOG', 50))  # packets a new client gets on connect
+PACKET_TICK = float(os.environ.get('SADRN_PACKET_TICK_MS', 100)) / 1000  # one packets frame per tick at most
+INGEST_BATCH = int(os.environ.get('SADRN_INGEST_BATCH', 500))  # NDJSON lines applied together
+INGEST_FLUSH = float(os.environ.get('SADRN_INGEST_FLUSH_MS', 100)) / 1000  # max wait before a partial batch
+POLL_INTERVAL = float(os.environ.get('SADRN_POLL_INTERVAL', 2))  # controller poll after a change
+POLL_MAX = float(os.environ.get('SADRN_POLL_MAX', 10))  # backed-off poll while nothing changes
+POLL_EMERGENCY = float(os.environ.get('SADRN_POLL_EMERGENCY', 0.5))  # poll while an emergency is active
+POLL_BACKOFF = 1.5
+CONTROLLER_VIEWS = ('/sadrn/topology', '/sadrn/paths', '/sadrn/stats', '/sadrn/battery', '/sadrn/emergency')
+ZONES = {'flood': 'flood', 'eq': 'earthquake', 'fire': 'fire'}  # sensor id prefix -> zone
+HOST_ZONES = {'h1': ('flood', 'gw_a'), 'h2': ('earthquake', 'gw_b'), 'h3': ('fire', 'gw_c')}  # gateway hosts
 
-# State storage
-state = {
+# State: immutable snapshots, read lock-free through store.current (see state_store.py)
+store = StateStore({
     'topology': {'nodes': [], 'edges': []},
     'battery_levels': {'s1': 100, 's2': 100, 's3': 100},
     'emergency_status': {'h1': False, 'h2': False, 'h3': False},
     'disaster_types': {'h1': None, 'h2': None, 'h3': None},
     'paths': {},
-    'recent_packets': [],
     'display_stats': {
         'total_packets': 0,
         'normal_packets': 0,
@@ -35,80 +58,141 @@ state = {
         'packets_by_host': {'h1': 0, 'h2': 0, 'h3': 0},
         'avg_latency_ms': None
     },
-    'controller_connected': False
-}
+    'controller_connected': False,
+    'poll_interval': POLL_INTERVAL
+})
 
-state_lock = threading.Lock()
+packets = PacketStream(PACKET_BUFFER)
+controller = Upstream('controller', CONTROLLER_URL)
+poll_wake = threading.Event()  # set once queued writes reach the controller, so the poller sees them at once
+commands = CommandQueue(Upstream('controller-commands', CONTROLLER_URL), on_sent=lambda batch: poll_wake.set())
+stream_stats = StreamStats()  # rates and latency percentiles of ingested packets
+subscriptions = Subscriptions(socketio, ('packets', 'live_update', 'battery_update', 'emergency_update'),
+                              filterable=('packets', 'live_update', 'battery_update', 'emergency_update'))
 
 
-def fetch_controller_data():
-    """Fetch data from SDN controller"""
-    global state
+def packet_topics(packet):
+    """Subscription topics of a packet: its zone, gateway and sensor"""
+    sensor = packet['sensor_type']
+    return (f"zone:{ZONES.get(sensor.split('_')[0], 'unknown')}", f"gateway:{packet['gateway']}",
+            f'sensor:{sensor}')
+
+
+def host_topics(host):
+    """Subscription topics of a gateway host (its paths, emergencies and switch): zone, gateway"""
+    zone, gateway = HOST_ZONES.get(host, ('unknown', 'unknown'))
+    return (f'zone:{zone}', f'gateway:{gateway}')
+
+
+def merge_controller_data(snap, results):
+    """State changes from the controller views that changed since the last poll"""
+    topology, changed = results['/sadrn/topology']
+    changes = {}
+    if snap['controller_connected'] != (topology is not None):
+        changes['controller_connected'] = topology is not None
+    if changed:
+        changes['topology'] = topology
     
-    try:
-        # Get topology from controller
-        resp = requests.get(f'{CONTROLLER_URL}/sadrn/topology', timeout=2)
-        if resp.ok:
-            with state_lock:
-                state['topology'] = resp.json()
-                state['controller_connected'] = True
-        
-        # Get paths from controller
-        resp = requests.get(f'{CONTROLLER_URL}/sadrn/paths', timeout=2)
-        if resp.ok:
-            with state_lock:
-                state['paths'] = resp.json()
-        
-        # Get stats from controller
-        resp = requests.get(f'{CONTROLLER_URL}/sadrn/stats', timeout=2)
-        if resp.ok:
-            data = resp.json()
-            with state_lock:
-                if 'battery_levels' in data:
-                    for k, v in data['battery_levels'].items():
-                        state['battery_levels'][f's{k}'] = v
-                if 'emergency_status' in data:
-                    state['emergency_status'].update(data['emergency_status'])
-                state['display_stats']['total_packets'] = data.get('total', 0)
-                state['display_stats']['normal_packets'] = data.get('normal', 0)
-                state['display_stats']['emergency_packets'] = data.get('emergency', 0)
-        
-        # Get battery levels
-        resp = requests.get(f'{CONTROLLER_URL}/sadrn/battery', timeout=2)
-        if resp.ok:
-            data = resp.json()
-            with state_lock:
-                for k, v in data.items():
-                    state['battery_levels'][f's{k}'] = v
-        
-        # Get emergency status
-        resp = requests.get(f'{CONTROLLER_URL}/sadrn/emergency', timeout=2)
-        if resp.ok:
-            data = resp.json()
-            with state_lock:
-                if 'status' in data:
-                    state['emergency_status'].update(data['status'])
-                if 'types' in data:
-                    state['disaster_types'].update(data['types'])
-                    
-    except requests.exceptions.ConnectionError:
-        with state_lock:
-            state['controller_connected'] = False
-    except Exception as e:
-        pass
+    paths, changed = results['/sadrn/paths']
+    if changed:
+        changes['paths'] = paths
+    
+    battery = dict(snap['battery_levels'])
+    emergency = dict(snap['emergency_status'])
+    types = dict(snap['disaster_types'])
+    
+    data, changed = results['/sadrn/stats']
+    if changed:
+        for k, v in data.get('battery_levels', {}).items():
+            battery[f's{k}'] = v
+        emergency.update(data.get('emergency_status', {}))
+        changes['display_stats'] = {**snap['display_stats'],
+                                    'total_packets': data.get('total', 0),
+                                    'normal_packets': data.get('normal', 0),
+                                    'emergency_packets': data.get('emergency', 0)}
+    
+    data, changed = results['/sadrn/battery']
+    if changed:
+        for k, v in data.items():
+            battery[f's{k}'] = v
+    
+    data, changed = results['/sadrn/emergency']
+    if changed:
+        emergency.update(data.get('status', {}))
+        types.update(data.get('types', {}))
+    
+    for key, value in (('battery_levels', battery), ('emergency_status', emergency), ('disaster_types', types)):
+        if value != snap[key]:
+            changes[key] = value
+    return changes
+
+
+def fetch_controller_data():
+    """Fetch the controller's five views concurrently with conditional requests and merge
+    the ones that changed; returns True if anything changed"""
+    results = dict(zip(CONTROLLER_VIEWS, fan_out(
+        *(partial(controller.get_if_changed, path) for path in CONTROLLER_VIEWS))))
+    store.update(merge_controller_data, results)
+    return any(changed for _, changed in results.values())
 
 
 def poll_controller():
-    """Background thread to poll controller and emit updates"""
+    """Background thread to poll controller and emit updates. Polls every POLL_EMERGENCY
+    seconds during an emergency, otherwise backs off from POLL_INTERVAL to POLL_MAX while
+    nothing changes; writes wake it early. live_update only goes out when it differs."""
+    interval, last_update = POLL_INTERVAL, None
+    while True:
+        changed = fetch_controller_data()
+        snap = store.current
+        update = {'display_stats': snap['display_stats'], 'paths': snap['paths']}
+        if update != last_update:
+            subscriptions.emit_partitioned('live_update', update, 'paths', host_topics)
+            last_update = update
+        
+        if any(snap['emergency_status'].values()):
+            interval = POLL_EMERGENCY
+        elif changed:
+            interval = POLL_INTERVAL
+        else:
+            interval = min(interval * POLL_BACKOFF, POLL_MAX)
+        if interval != snap['poll_interval']:
+            store.set(poll_interval=interval)
+        poll_wake.wait(interval)
+        poll_wake.clear()
+
+
+def display_stats():
+    """display_stats with the streaming rates and latency percentiles (overall and per host)"""
+    stream = stream_stats.snapshot()
+    stats = dict(store.current['display_stats'])
+    stats['avg_latency_ms'] = stream['latency_ms']['mean']
+    for key in ('rates', 'latency_ms', 'recent_latency_ms', 'hosts'):
+        stats[key] = stream[key]
+    return stats
+
+
+def stream_packets():
+    """Background thread: packets appended since the last frame, to every client, once per tick.
+    'after' is the seq the frame continues from and 'until' its last seq; a client whose
+    cursor differs from 'after' asks for the gap with packets_since. Filtered subscribers
+    get only their packets (maybe none) in frames with the same 'after' and 'until'."""
+    cursor = packets.seq
     while True:
-        fetch_controller_data()
-        with state_lock:
-            socketio.emit('live_update', {
-                'display_stats': state['display_stats'],
-                'recent_packets': state['recent_packets'],
-                'paths': state['paths']
-            })
-        time.sleep(2)
+        time.sleep(PACKET_TICK)
+        new, missed = packets.since(cursor, limit=PACKET_BUFFER)
+        if not new:
+            continue
+        # Faster than the buffer between ticks: say so rather than claim continuity
+        after, until = new[0]['seq'] - 1 if missed else cursor, new[-1]['seq']
+        try:
+            stats = display_stats()
+            for targets, group in subscriptions.partition('packets', new, packet_topics):
+                socketio.emit('packets', {'after': after, 'until': until, 'packets': group,
+                                          'missed': missed, 'display_stats': stats}, to=targets)
+        except Exception as e:
+            # One bad tick must not stop the stream; clients fill the gap with packets_since
+            print(f"[DASHBOARD] packets {after + 1}-{until} not streamed: {e!r}")
+        cursor = until
 
 
 # ============== API Routes ==============
@@ -116,136 +200,204 @@ def poll_controller():
 @app.route('/api/state', methods=['GET'])
 def get_state():
     """Get full state for React dashboard"""
-    with state_lock:
-        return jsonify({
-            'topology': state['topology'],
-            'battery_levels': state['battery_levels'],
-            'emergency_status': state['emergency_status'],
-            'disaster_types': state['disaster_types'],
-            'paths': state['paths'],
-            'recent_packets': state['recent_packets'][-50:],
-            'display_stats': state['display_stats'],
-            'controller_connected': state['controller_connected'],
-            'timestamp': datetime.now().isoformat()
-        })
+    snap = store.current
+    return jsonify({
+        'topology': snap['topology'],
+        'battery_levels': snap['battery_levels'],
+        'emergency_status': snap['emergency_status'],
+        'disaster_types': snap['disaster_types'],
+        'paths': snap['paths'],
+        'recent_packets': packets.latest(50),
+        'packet_seq': packets.seq,
+        'display_stats': display_stats(),
+        'controller_connected': snap['controller_connected'],
+        'poll_interval': snap['poll_interval'],
+        'timestamp': datetime.now().isoformat()
+    })
 
 
 @app.route('/api/topology', methods=['GET'])
 def get_topology():
     """Get network topology"""
-    with state_lock:
-        return jsonify(state['topology'])
+    return jsonify(store.current['topology'])
 
 
 @app.route('/api/battery/<switch_id>', methods=['GET', 'POST'])
 def handle_battery(switch_id):
     """Get or set battery level for a switch"""
     if request.method == 'POST':
-        data = request.get_json() or {}
-        level = data.get('level', 100)
-        
-        with state_lock:
-            state['battery_levels'][switch_id] = level
+        if switch_id not in store.current['battery_levels']:
+            return jsonify({'status': 'error', 'error': f'Unknown switch {switch_id}'}), 404
+        data = request.get_json(silent=True) or {}
         
-        # Forward to SDN controller
+        # Forward to SDN controller (batched; rapid slider moves collapse to the last level)
         try:
-            sw_num = switch_id.replace('s', '')
-            requests.post(f'{CONTROLLER_URL}/sadrn/battery/{sw_num}',
-                         json={'level': level}, timeout=2)
-        except:
-            pass
+            _, level = commands.put('battery', switch_id, data.get('level', 100))
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': str(e)}), 400
+        
+        store.update(lambda snap: {'battery_levels': {**snap['battery_levels'], switch_id: level}})
         
-        socketio.emit('battery_update', {'switch': switch_id, 'level': level})
+        # sN is host hN's switch on the controller
+        subscriptions.emit('battery_update', {'switch': switch_id, 'level': level},
+                           topics=host_topics(switch_id.replace('s', 'h', 1)))
         return jsonify({'status': 'ok', 'switch': switch_id, 'level': level})
     else:
-        with state_lock:
-            return jsonify({'switch': switch_id, 'level': state['battery_levels'].get(switch_id, 100)})
+        return jsonify({'switch': switch_id, 'level': store.current['battery_levels'].get(switch_id, 100)})
 
 
 @app.route('/api/emergency/<host>', methods=['GET', 'POST'])
 def handle_emergency(host):
     """Get or set emergency status for a host"""
     if request.method == 'POST':
-        data = request.get_json() or {}
-        enabled = data.get('enabled', False)
-        disaster_type = data.get('disaster_type')
+        if host not in store.current['emergency_status']:
+            return jsonify({'status': 'error', 'error': f'Unknown host {host}'}), 404
+        data = request.get_json(silent=True) or {}
         
-        with state_lock:
-            state['emergency_status'][host] = enabled
-            state['disaster_types'][host] = disaster_type if enabled else None
-        
-        # Forward to SDN controller
+        # Forward to SDN controller (batched)
         try:
-            requests.post(f'{CONTROLLER_URL}/sadrn/emergency/{host}',
-                         json={'status': enabled, 'disaster_type': disaster_type}, timeout=2)
-        except:
-            pass
+            _, command = commands.put('emergency', host, {'status': data.get('enabled', False),
+                                                          'disaster_type': data.get('disaster_type')})
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': str(e)}), 400
+        enabled, disaster_type = command['status'], command['disaster_type']
+        
+        store.update(lambda snap: {'emergency_status': {**snap['emergency_status'], host: enabled},
+                                   'disaster_types': {**snap['disaster_types'], host: disaster_type}})
         
-        socketio.emit('emergency_update', {
+        subscriptions.emit('emergency_update', {
             'host': host,
             'emergency': enabled,
             'disaster_type': disaster_type
-        })
+        }, topics=host_topics(host))
         return jsonify({'status': 'ok', 'host': host, 'emergency': enabled, 'disaster_type': disaster_type})
     else:
-        with state_lock:
-            return jsonify({
-                'host': host,
-                'emergency': state['emergency_status'].get(host, False),
-                'disaster_type': state['disaster_types'].get(host)
-            })
+        snap = store.current
+        return jsonify({
+            'host': host,
+            'emergency': snap['emergency_status'].get(host, False),
+            'disaster_type': snap['disaster_types'].get(host)
+        })
 
 
 @app.route('/api/paths', methods=['GET'])
 def get_paths():
     """Get current paths to display"""
-    with state_lock:
-        return jsonify(state['paths'])
+    return jsonify(store.current['paths'])
+
+
+@app.route('/api/packets', methods=['GET'])
+def get_packets():
+    """Packets after a cursor: ?after=<seq> (default: the last PACKET_BACKLOG) &limit="""
+    after = request.args.get('after', type=int)
+    limit = max(1, min(PACKET_BUFFER, request.args.get('limit', PACKET_BUFFER, type=int)))
+    if after is None:
+        new, missed = packets.latest(min(limit, PACKET_BACKLOG)), False
+    else:
+        new, missed = packets.since(after, limit)
+    return jsonify({'seq': packets.seq, 'missed': missed, 'packets': new})
 
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get packet statistics"""
-    with state_lock:
-        return jsonify(state['display_stats'])
+    return jsonify(display_stats())
 
 
-@app.route('/api/packet', methods=['POST'])
-def add_packet():
-    """Receive packet data from display server"""
-    data = request.get_json() or {}
-    
-    packet_info = {
-        'source': data.get('source', 'unknown'),
+def latency_of(data):
+    """The packet's latency_ms as a float, or None when missing or not a number"""
+    latency = data.get('latency_ms')
+    if isinstance(latency, bool):
+        return None
+    try:
+        latency = float(latency)
+    except (TypeError, ValueError):
+        return None
+    return latency if math.isfinite(latency) else None
+
+
+def packet_record(data):
+    return {
+        'source': str(data.get('source', 'unknown')),
         'destination': data.get('destination', 'unknown'),
         'priority': data.get('priority', 'normal'),
-        'sensor_type': data.get('sensor_type', 'unknown'),
+        'sensor_type': str(data.get('sensor_type') or 'unknown'),
         'value': data.get('value'),
         'gateway': data.get('gateway'),
+        'latency_ms': latency_of(data),
         'timestamp': datetime.now().isoformat()
     }
+
+
+def count_packets(snap, total, emergency, hosts):
+    stats = snap['display_stats']
+    by_host = dict(stats['packets_by_host'])
+    for host, count in hosts.items():
+        if host in by_host:
+            by_host[host] += count
+    return {'display_stats': {**stats,
+                              'total_packets': stats['total_packets'] + total,
+                              'emergency_packets': stats['emergency_packets'] + emergency,
+                              'normal_packets': stats['normal_packets'] + total - emergency,
+                              'packets_by_host': by_host}}
+
+
+def ingest(batch):
+    """Store a batch of packets and apply their stats at once; returns (last seq, count)"""
+    records = [packet_record(data) for data in batch if isinstance(data, dict)]
+    if not records:
+        return packets.seq, 0
+    seq = packets.extend(records)
+    emergency = sum(r['priority'] == 'emergency' for r in records)
+    hosts = [r['source'].replace('10.0.0.', 'h') for r in records]
+    stream_stats.record_batch(
+        (host, r['latency_ms'], r['priority'] == 'emergency') for host, r in zip(hosts, records))
+    store.update(count_packets, len(records), emergency, Counter(hosts))
     
-    with state_lock:
-        state['recent_packets'].append(packet_info)
-        state['recent_packets'] = state['recent_packets'][-100:]
-        
-        # Update stats
-        state['display_stats']['total_packets'] += 1
-        if data.get('priority') == 'emergency':
-            state['display_stats']['emergency_packets'] += 1
-        else:
-            state['display_stats']['normal_packets'] += 1
-        
-        host = data.get('source', '').replace('10.0.0.', 'h')
-        if host in state['display_stats']['packets_by_host']:
-            state['display_stats']['packets_by_host'][host] += 1
-    
-    socketio.emit('live_update', {
-        'display_stats': state['display_stats'],
-        'recent_packets': state['recent_packets'][-50:]
-    })
-    
-    return jsonify({'status': 'ok'})
+    # stream_packets sends them with the next frame
+    return seq, len(records)
+
+
+def ingest_stream(stream):
+    """Apply an NDJSON stream in batches of INGEST_BATCH lines, or whatever arrived within
+    INGEST_FLUSH (checked per line: idle senders write blank lines as heartbeats)"""
+    batch, received, invalid, seq = [], 0, 0, packets.seq
+    flush_at = None
+    if request.content_length and isinstance(stream, io.RawIOBase):
+        # raw readline() reads one byte at a time. Only a body of known length is buffered:
+        # the dev server's chunked reader would block until a whole buffer arrived
+        stream = io.BufferedReader(stream)
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                batch.append(json.loads(line))
+            except ValueError:
+                invalid += 1
+                continue
+            flush_at = flush_at or time.time() + INGEST_FLUSH
+        if batch and (len(batch) >= INGEST_BATCH or time.time() >= flush_at):
+            seq, count = ingest(batch)
+            received += count
+            batch, flush_at = [], None
+    if batch:
+        seq, count = ingest(batch)
+        received += count
+    return {'status': 'ok', 'received': received, 'invalid': invalid, 'seq': seq}
+
+
+@app.route('/api/packet', methods=['POST'])
+def add_packet():
+    """Receive packets from the display server: one JSON object, a JSON array, or a
+    (chunked, long-lived) application/x-ndjson stream of one packet per line"""
+    if request.mimetype == 'application/x-ndjson':
+        return jsonify(ingest_stream(request.stream))
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        seq, count = ingest(data)
+        return jsonify({'status': 'ok', 'received': count, 'seq': seq})
+    seq, _ = ingest([data or {}])
+    return jsonify({'status': 'ok', 'seq': seq})
 
 
 # ============== Socket.IO Events ==============
@@ -253,23 +405,60 @@ def add_packet():
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
-    with state_lock:
-        emit('state_update', {
-            'battery_levels': state['battery_levels'],
-            'emergency_status': state['emergency_status'],
-            'disaster_types': state['disaster_types']
-        })
+    subscriptions.subscribe(request.sid)
+    snap = store.current
+    emit('state_update', {
+        'battery_levels': snap['battery_levels'],
+        'emergency_status': snap['emergency_status'],
+        'disaster_types': snap['disaster_types']
+    })
+    backlog = packets.latest(PACKET_BACKLOG)
+    emit('packets', {'after': backlog[0]['seq'] - 1 if backlog else packets.seq, 'until': packets.seq,
+                     'packets': backlog})
+
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    subscriptions.drop(request.sid)
+
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """{'events': [...], 'zones': [...], 'gateways': [...], 'sensors': [...]}; empty for everything"""
+    try:
+        rooms = subscriptions.subscribe(request.sid, data)
+    except ValueError as e:
+        emit('subscription_error', {'error': str(e)})
+        return
+    emit('subscribed', {'rooms': sorted(rooms)})
+
+
+@socketio.on('packets_since')
+def handle_packets_since(data):
+    """Resume from a client's cursor; 'missed' when some of the gap was already evicted"""
+    data = data if isinstance(data, dict) else {}
+    try:
+        cursor = int(data.get('after', 0))
+    except (TypeError, ValueError):
+        error = {'error': f"Invalid cursor {data.get('after')!r}"}
+        emit('packets_error', error)
+        return error
+    new, missed = packets.since(cursor, limit=PACKET_BUFFER)
+    after = cursor if not missed else (new[0]['seq'] - 1 if new else packets.seq)
+    until = new[-1]['seq'] if new else after
+    new = [p for p in new if subscriptions.wants(request.sid, 'packets', packet_topics(p))]
+    emit('packets', {'after': after, 'until': until, 'packets': new, 'missed': missed})
 
 
 @socketio.on('request_state')
 def handle_request_state():
     """Send current state to client"""
-    with state_lock:
-        emit('state_update', {
-            'battery_levels': state['battery_levels'],
-            'emergency_status': state['emergency_status'],
-            'disaster_types': state['disaster_types']
-        })
+    snap = store.current
+    emit('state_update', {
+        'battery_levels': snap['battery_levels'],
+        'emergency_status': snap['emergency_status'],
+        'disaster_types': snap['disaster_types']
+    })
 
 
 if __name__ == '__main__':
@@ -283,5 +472,6 @@ if __name__ == '__main__':
     # Start background polling thread
     poll_thread = threading.Thread(target=poll_controller, daemon=True)
     poll_thread.start()
+    threading.Thread(target=stream_packets, daemon=True).start()
     
     socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
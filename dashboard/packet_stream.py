@@ -0,0 +1,52 @@
+"""
+SADRN Packet Stream - sequence-numbered packet ring read through client cursors
+"""
+import threading
+from collections import deque
+from itertools import islice
+
+
+class PacketStream:
+    """Append-only stream of packets; seq 1, 2, ... Only the last `capacity` are kept.
+
+    Readers hold a cursor (the last seq they have) and ask for what came after it, so a
+    packet is sent to each client once instead of with every update.
+    """
+
+    def __init__(self, capacity):
+        self.lock = threading.Lock()
+        self.packets = deque(maxlen=capacity)
+        self.seq = 0
+
+    def append(self, packet):
+        with self.lock:
+            self.seq += 1
+            self.packets.append({**packet, 'seq': self.seq})
+            return self.seq
+
+    def extend(self, batch):
+        """Append several packets under one lock; returns the last seq"""
+        with self.lock:
+            for packet in batch:
+                self.seq += 1
+                self.packets.append({**packet, 'seq': self.seq})
+            return self.seq
+
+    def since(self, cursor, limit=None):
+        """Up to `limit` packets with seq > cursor, oldest first (page on with the last seq),
+        and whether some of them were already evicted. A cursor ahead of the stream (the
+        server restarted) reads from the start of the buffer."""
+        with self.lock:
+            first = self.seq - len(self.packets) + 1
+            if cursor > self.seq:
+                cursor = first - 1
+                missed = True
+            else:
+                missed = cursor + 1 < first
+            skip = max(0, cursor + 1 - first)
+            end = None if limit is None else skip + limit
+            return list(islice(self.packets, skip, end)), missed
+
+    def latest(self, n):
+        with self.lock:
+            return list(islice(self.packets, max(0, len(self.packets) - n), None)) if n else []
@@ -0,0 +1,48 @@
+"""
+SADRN State Store - immutable state snapshots swapped in atomically (copy-on-write)
+"""
+import threading
+
+
+class FrozenDict(dict):
+    """Read-only dict; still a dict for jsonify/json.dumps"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('state snapshots are read-only')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(value):
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class StateStore:
+    """The current state is one frozen snapshot in `current`. Readers and emitters take it
+    without a lock and can keep using it: it never changes. Writers go through update(),
+    which builds the next snapshot from the current one and swaps it in, sharing every
+    value they did not replace. Only writers wait on each other."""
+
+    def __init__(self, initial):
+        self.lock = threading.Lock()
+        self.current = freeze(initial)
+        self.version = 0
+
+    def update(self, fn, *args):
+        """Apply fn(current, *args) -> {key: new value} (or None for no change); returns
+        (the snapshot now current, fn's changes)"""
+        with self.lock:
+            changes = fn(self.current, *args)
+            if changes:
+                self.current = FrozenDict({**self.current, **freeze(changes)})
+                self.version += 1
+            return self.current, changes
+
+    def set(self, **changes):
+        return self.update(lambda snap: changes)[0]
@@ -0,0 +1,122 @@
+"""
+SADRN Subscriptions - per-client Socket.IO rooms by event type, zone, gateway and sensor
+"""
+import threading
+from collections import Counter
+
+from flask_socketio import join_room, leave_room
+
+ALL = 'all'
+FILTERS = {'zones': 'zone', 'gateways': 'gateway', 'sensors': 'sensor'}
+
+
+class Subscriptions:
+    """What each client wants, kept as Socket.IO rooms.
+
+    A client starts in ALL and receives every event. subscribe() replaces that with one
+    room per wanted event: '<event>' for all of it, or '<event>/<dim>:<value>' per zone,
+    gateway or sensor filter when the event is `filterable`. Filters OR together and AND
+    with the event list. Emits go only to occupied rooms, and not at all when none are.
+    """
+
+    def __init__(self, socketio, events, filterable=()):
+        self.socketio = socketio
+        self.events = tuple(events)
+        self.filterable = set(filterable)
+        self.lock = threading.Lock()
+        self.clients = {}  # sid -> rooms
+        self.occupied = Counter()
+
+    def rooms_for(self, spec):
+        """Rooms for {'events': [...], 'zones': [...], 'gateways': [...], 'sensors': [...]};
+        ValueError on an unknown event"""
+        spec = spec or {}
+        unknown = set(spec.get('events') or ()) - set(self.events)
+        if unknown:
+            raise ValueError(f'Unknown events: {", ".join(sorted(unknown))}')
+        topics = [f'{dim}:{value}' for key, dim in FILTERS.items() for value in spec.get(key) or ()]
+        if not topics and not spec.get('events'):
+            return {ALL}
+        rooms = set()
+        for event in spec.get('events') or self.events:
+            if topics and event in self.filterable:
+                rooms.update(f'{event}/{topic}' for topic in topics)
+            else:
+                rooms.add(event)
+        return rooms
+
+    def subscribe(self, sid, spec=None):
+        """Move a client into the rooms for `spec` (everything when empty); returns them"""
+        rooms = self.rooms_for(spec)
+        with self.lock:
+            old = self.clients.get(sid, set())
+            self.clients[sid] = rooms
+            self.occupied.update(rooms - old)
+            self.occupied.subtract(old - rooms)
+            self.occupied += Counter()
+        for room in old - rooms:
+            leave_room(room, sid=sid)
+        for room in rooms - old:
+            join_room(room, sid=sid)
+        return rooms
+
+    def drop(self, sid):
+        with self.lock:
+            self.occupied.subtract(self.clients.pop(sid, set()))
+            self.occupied += Counter()
+
+    def targets(self, event, topics=()):
+        """Occupied rooms that want an `event` tagged with `topics`"""
+        rooms = (ALL, event, *(f'{event}/{topic}' for topic in topics))
+        with self.lock:
+            return [room for room in rooms if self.occupied[room]]
+
+    def wants(self, sid, event, topics=()):
+        with self.lock:
+            rooms = self.clients.get(sid, {ALL})
+        return not rooms.isdisjoint((ALL, event, *(f'{event}/{topic}' for topic in topics)))
+
+    def emit(self, event, payload, topics=()):
+        """Emit to the rooms that want it; False (nothing serialised) when nobody does"""
+        rooms = self.targets(event, topics)
+        if rooms:
+            self.socketio.emit(event, payload, to=rooms)
+        return bool(rooms)
+
+    def partition(self, event, items, topics_of):
+        """[(targets, items)] for a list-valued event, one frame per client: every item to
+        ALL and '<event>', and to each group of clients with the same filters (addressed by
+        sid) only the items matching them, possibly none. A dict is filtered by its keys.
+        Groups that pick the same items share one entry, so each distinct frame is
+        serialised once per emit however many filter combinations want it"""
+        prefix = f'{event}/'
+        with self.lock:
+            whole = [room for room in (ALL, event) if self.occupied[room]]
+            profiles = {}
+            for sid, rooms in self.clients.items():
+                filters = frozenset(room for room in rooms if room.startswith(prefix))
+                if filters:
+                    profiles.setdefault(filters, []).append(sid)
+        groups = [(whole, items)] if whole else []
+        for filters, sids in profiles.items():
+            picked = [item for item in items if not filters.isdisjoint(prefix + topic for topic in topics_of(item))]
+            picked = {key: items[key] for key in picked} if isinstance(items, dict) else picked
+            for targets, group in groups:
+                if group == picked:
+                    targets.extend(sids)
+                    break
+            else:
+                groups.append((list(sids), picked))
+        return groups
+
+    def emit_partitioned(self, event, payload, field, topics_of):
+        """Emit a dict payload whose `field` is partition()-ed per client; False when nobody
+        wants it"""
+        groups = self.partition(event, payload[field], topics_of)
+        for targets, items in groups:
+            self.socketio.emit(event, {**payload, field: items}, to=targets)
+        return bool(groups)
+
+    def status(self):
+        with self.lock:
+            return {'clients': len(self.clients), 'rooms': dict(self.occupied)}
@@ -0,0 +1,223 @@
+"""
+SADRN Upstream Client - pooled keep-alive sessions, fan-out, circuit breakers and a
+stale-while-revalidate cache for the Ryu controller and display node
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = int(os.environ.get('SADRN_UPSTREAM_POOL', 16))  # keep-alive connections per upstream
+BREAKER_FAILURES = int(os.environ.get('SADRN_BREAKER_FAILURES', 3))  # consecutive failures that open it
+BREAKER_RESET = float(os.environ.get('SADRN_BREAKER_RESET', 10))  # seconds open before one trial call
+CACHE_TTL = float(os.environ.get('SADRN_CACHE_TTL', 2))  # seconds before a cached response is revalidated
+
+_fan_out_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='upstream')
+
+
+class CircuitBreaker:
+    """closed -> open after `failures` consecutive errors; after `reset_after` seconds one
+    trial call goes through (half-open) and closes it again on success"""
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.errors = 0
+        self.opened_at = None
+        self.short_circuited = 0
+
+    def allow(self):
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.time() - self.opened_at >= self.reset_after:
+                self.state = 'half-open'
+                return True
+            self.short_circuited += 1
+            return False
+
+    def success(self):
+        with self.lock:
+            self.state, self.errors, self.opened_at = 'closed', 0, None
+
+    def failure(self):
+        with self.lock:
+            self.errors += 1
+            if self.state == 'half-open' or self.errors >= self.failures:
+                self.state, self.opened_at = 'open', time.time()
+
+    def status(self):
+        with self.lock:
+            return {'state': self.state, 'errors': self.errors, 'opened_at': self.opened_at,
+                    'short_circuited': self.short_circuited}
+
+
+class Upstream:
+    """One dependency: a keep-alive session and a breaker. Calls never raise; request() and
+    get() return the fallback (a value, or a callable evaluated only when needed) on an error
+    response or while open."""
+
+    def __init__(self, name, base_url, pool_size=POOL_SIZE):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = CircuitBreaker()
+        self.validators = {}  # path -> (ETag, last body) for get_if_changed
+
+    def send(self, method, path, timeout=2, **kwargs):
+        """The response, or None while the breaker is open or when the dependency is
+        unreachable. Only that, timeouts and 5xx count against the breaker: a 4xx is a
+        healthy dependency refusing this request, and goes back to the caller."""
+        if not self.breaker.allow():
+            return None
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            self.breaker.failure()
+            return None
+        if response.status_code >= 500:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+        return response
+
+    def call(self, method, path, timeout=2, **kwargs):
+        """(status, JSON body or None); status None as for send()"""
+        response = self.send(method, path, timeout, **kwargs)
+        if response is None:
+            return None, None
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+    def request(self, method, path, fallback=None, timeout=2, **kwargs):
+        status, result = self.call(method, path, timeout, **kwargs)
+        if status is None or status >= 400 or result is None:
+            return fallback() if callable(fallback) else fallback
+        return result
+
+    def get(self, path, fallback=None, timeout=2):
+        return self.request('GET', path, fallback, timeout)
+
+    def get_if_changed(self, path, timeout=2):
+        """Conditional GET: (value, changed). Sends the last ETag as If-None-Match; a 304, or
+        the same body from a server without ETags, is unchanged. (None, False) on error or
+        while the breaker is open."""
+        etag, last = self.validators.get(path, (None, None))
+        response = self.send('GET', path, timeout, headers={'If-None-Match': etag} if etag else None)
+        if response is None or response.status_code >= 400:
+            return None, False
+        if response.status_code == 304:
+            return last, False
+        try:
+            value = response.json()
+        except ValueError:
+            return None, False
+        self.validators[path] = (response.headers.get('ETag'), value)
+        return value, value != last
+
+    def post(self, path, json=None, fallback=None, timeout=2):
+        return self.request('POST', path, fallback, timeout, json=json)
+
+    def status(self):
+        return {'url': self.base_url, **self.breaker.status()}
+
+
+class SWRCache:
+    """Stale-while-revalidate over an Upstream's GETs. A cached response is served at once;
+    past the TTL it is also refreshed in the background (one refresh per path at a time).
+    Only a cold path waits for the upstream, and concurrent misses for it share one fetch.
+    A failed refresh keeps the stale entry; its age tells callers how old it is."""
+
+    def __init__(self, upstream, ttl=CACHE_TTL):
+        self.upstream = upstream
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}  # path -> (value, fetched_at, expired)
+        self.refreshing = set()
+        self.inflight = {}  # path -> Event set when its cold fetch finishes
+        self.hits = self.misses = self.refreshes = 0
+
+    def get(self, path, fallback=None, timeout=2):
+        """(value, age in seconds, source): source is 'upstream' or 'fallback'"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                self.misses += 1
+                done = self.inflight.get(path)
+                leader = done is None
+                if leader:
+                    done = self.inflight[path] = threading.Event()
+            else:
+                self.hits += 1
+        if entry is None:
+            if leader:
+                try:
+                    value = self._fetch(path, timeout)
+                finally:
+                    with self.lock:
+                        del self.inflight[path]
+                    done.set()
+            else:
+                done.wait(timeout)
+                with self.lock:
+                    entry = self.entries.get(path)
+                value = entry[0] if entry else None
+            if value is None:
+                return (fallback() if callable(fallback) else fallback), 0.0, 'fallback'
+            return value, 0.0, 'upstream'
+        value, fetched_at, expired = entry
+        if expired or now - fetched_at >= self.ttl:
+            self.revalidate(path, timeout)
+        return value, now - fetched_at, 'upstream'
+
+    def revalidate(self, path, timeout=2):
+        with self.lock:
+            if path in self.refreshing:
+                return
+            self.refreshing.add(path)
+        _fan_out_pool.submit(self._refresh, path, timeout)
+
+    def expire(self, *paths):
+        """Mark entries stale (after a write upstream): next read serves them and refreshes"""
+        with self.lock:
+            for path in paths:
+                if path in self.entries:
+                    self.entries[path] = self.entries[path][:2] + (True,)
+
+    def _fetch(self, path, timeout):
+        value = self.upstream.get(path, None, timeout)
+        if value is not None:
+            with self.lock:
+                self.entries[path] = (value, time.time(), False)
+        return value
+
+    def _refresh(self, path, timeout):
+        try:
+            self._fetch(path, timeout)
+        finally:
+            with self.lock:
+                self.refreshes += 1
+                self.refreshing.discard(path)
+
+    def status(self):
+        now = time.time()
+        with self.lock:
+            return {'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses, 'refreshes': self.refreshes,
+                    'ages': {path: round(now - entry[1], 3) for path, entry in self.entries.items()}}
+
+
+def fan_out(*calls):
+    """Run zero-argument callables concurrently; results in call order"""
+    futures = [_fan_out_pool.submit(call) for call in calls]
+    return [future.result() for future in futures]
@@ -12,16 +12,25 @@ import threading
 import argparse
 import signal
 import sys
+import os
 import requests
 from collections import deque, OrderedDict
 from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.stream_stats import StreamStats
 
 class DisplayServer:
-    def __init__(self, listen_port=9001, dashboard_url='http://localhost:5000'):
+    def __init__(self, listen_port=9001, dashboard_url='http://localhost:5000', batch_ms=100, stream=False):
         self.listen_port = listen_port
         self.dashboard_url = dashboard_url
         self.running = True
         
+        # Packets for the dashboard are queued and forwarded in batches (or one NDJSON stream)
+        self.batch_interval = batch_ms / 1000
+        self.stream = stream
+        self.outbox = deque(maxlen=10000)
+        self.session = requests.Session()
+        
         # UDP socket for receiving from gateways
         self.recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.recv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -38,6 +47,7 @@ class DisplayServer:
         self.total_received = 0
         self.emergency_count = 0
         self.normal_count = 0
+        self.stats = StreamStats()  # rates and latency percentiles, per source host too
         
         # Flow tracking
         self.flows = deque(maxlen=100)
@@ -56,6 +66,14 @@ class DisplayServer:
         print(f"  Total Received: {self.total_received}")
         print(f"  Emergency: {self.emergency_count}")
         print(f"  Normal: {self.normal_count}")
+        print(self.format_stats(self.stats.snapshot()))
+    
+    def format_stats(self, s):
+        rates = ' '.join(f"{w}={r:g}/s" for w, r in s['rates'].items())
+        lat = s['recent_latency_ms']
+        if not lat['count']:
+            return f"  Rate: {rates}"
+        return f"  Rate: {rates} | Latency (last min) p50 {lat['p50']} p95 {lat['p95']} p99 {lat['p99']} ms"
     
     def process_packet(self, data, addr):
         """Process incoming packet from gateway"""
@@ -74,6 +92,11 @@ class DisplayServer:
             # Determine priority
             actual_priority = 'emergency' if is_alert else priority
             
+            # Sensors stamp packets with their send time (epoch seconds)
+            sent_at = packet.get('timestamp')
+            latency_ms = (time.time() - sent_at) * 1000 if isinstance(sent_at, (int, float)) else None
+            self.stats.record(source_ip, latency_ms, actual_priority == 'emergency')
+            
             # Track as flow
             flow = {
                 'source': source_ip,
@@ -83,7 +106,8 @@ class DisplayServer:
                 'value': value,
                 'unit': unit,
                 'priority': actual_priority,
-                'is_alert': is_alert
+                'is_alert': is_alert,
+                'latency_ms': latency_ms
             }
             
             with self.lock:
@@ -129,11 +153,43 @@ class DisplayServer:
             return "10.0.0.100"
     
     def send_to_dashboard(self, packet_data):
-        """Send data to dashboard backend via HTTP"""
-        try:
-            requests.post(f"{self.dashboard_url}/api/packet", json=packet_data, timeout=1)
-        except Exception as e:
-            pass  # Dashboard might not be running
+        """Queue data for the dashboard backend; forward_to_dashboard sends it"""
+        self.outbox.append(packet_data)
+    
+    def take_outbox(self):
+        batch = []
+        while self.outbox:
+            batch.append(self.outbox.popleft())
+        return batch
+    
+    def forward_to_dashboard(self):
+        """Post queued packets as one JSON array per interval"""
+        while self.running:
+            time.sleep(self.batch_interval)
+            batch = self.take_outbox()
+            if not batch:
+                continue
+            try:
+                self.session.post(f"{self.dashboard_url}/api/packet", json=batch, timeout=2)
+            except Exception:
+                pass  # Dashboard might not be running
+    
+    def ndjson_lines(self):
+        """Body of the streaming upload: queued packets, or a blank heartbeat line so the
+        dashboard applies a partial batch without waiting for the next packet"""
+        while self.running:
+            time.sleep(self.batch_interval)
+            batch = self.take_outbox()
+            yield ''.join(json.dumps(p) + '\n' for p in batch).encode() if batch else b'\n'
+    
+    def stream_to_dashboard(self):
+        """Keep one long-lived chunked NDJSON request open, reconnecting if it drops"""
+        while self.running:
+            try:
+                self.session.post(f"{self.dashboard_url}/api/packet", data=self.ndjson_lines(),
+                                  headers={'Content-Type': 'application/x-ndjson'}, timeout=(2, None))
+            except Exception:
+                time.sleep(1)  # Dashboard might not be running
     
     def get_priority_ordered_display(self):
         """Get all messages ordered by priority (emergency first)"""
@@ -155,6 +211,7 @@ class DisplayServer:
             for msg in self.get_priority_ordered_display():
                 status = "🚨 ALERT" if msg.get('is_alert') else "✓ Normal"
                 print(f"  {msg['sensor_id']:15} | {msg['value']:8.2f} {msg['unit']:6} | {status}")
+            print(self.format_stats(self.stats.snapshot()))
             print("="*60 + "\n")
     
     def run(self):
@@ -167,6 +224,8 @@ class DisplayServer:
         # Start status display thread
         status_thread = threading.Thread(target=self.display_status, daemon=True)
         status_thread.start()
+        sender = self.stream_to_dashboard if self.stream else self.forward_to_dashboard
+        threading.Thread(target=sender, daemon=True).start()
         
         while self.running:
             try:
@@ -184,12 +243,18 @@ if __name__ == '__main__':
     parser.add_argument('--port', type=int, default=9001, help='Listen port')
     parser.add_argument('--dashboard', default='http://localhost:5000', 
                        help='Dashboard backend URL')
+    parser.add_argument('--batch-ms', type=int, default=100,
+                       help='Forward packets to the dashboard every N ms')
+    parser.add_argument('--stream', action='store_true',
+                       help='Forward over one long-lived NDJSON stream instead of JSON arrays')
     
     args = parser.parse_args()
     
     server = DisplayServer(
         listen_port=args.port,
-        dashboard_url=args.dashboard
+        dashboard_url=args.dashboard,
+        batch_ms=args.batch_ms,
+        stream=args.stream
     )
     
     server.run()
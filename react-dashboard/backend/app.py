@@ -1,16 +1,49 @@
 """
 SADRN Flask Backend - Optimized Controller
 """
-from flask import Flask, jsonify, request
+import os
+# SADRN_ASYNC_MODE=eventlet serves websocket clients on green threads instead of one
+# OS thread each; the monkey patch has to run before anything else is imported
+ASYNC_MODE = os.environ.get('SADRN_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, Blueprint, jsonify, request, g
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
-import threading, time, heapq, random
+from flask_socketio import SocketIO, emit, join_room, leave_room
+import threading, time, heapq, random, hashlib
 from datetime import datetime
 from collections import defaultdict
+from event_store import EventStore
+from broadcaster import Broadcaster
+import frame_codec
+from state_sync import StateVersioner
+from engine import StateEngine, FrozenDict, assoc
+from status_index import StatusIndex
+from packet_sim import PacketSimulator
+from battery_model import CrossingScheduler, project, predict
+from time_series import TimeSeriesStore, DOWNSAMPLERS
+from journal import Journal
+from region_workers import RegionWorker, RemoteRegion
+from contingency import ReportCache, run_cases, rank
 
 app = Flask(__name__)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+
+EVENT_LOG_SIZE = int(os.environ.get('SADRN_EVENT_LOG_SIZE', 500))
+EMIT_TICK = float(os.environ.get('SADRN_EMIT_TICK_MS', 50)) / 1000
+HISTORY_SIZE = int(os.environ.get('SADRN_HISTORY_SIZE', 10000))  # samples kept per sensor
+BATTERY_DRAIN = float(os.environ.get('SADRN_BATTERY_DRAIN', 1))  # drain multiplier, 0 = off
+PORT = int(os.environ.get('FLASK_PORT', 5000))
+JOURNAL_PATH = os.environ.get('SADRN_JOURNAL')  # JSON-lines file of state-changing calls, off if unset
+MAX_CLIENTS = int(os.environ.get('SADRN_MAX_CLIENTS', 10000))  # eventlet connection limit
+DEFAULT_REGION = 'default'
+INITIAL_REGIONS = [r for r in os.environ.get('SADRN_REGIONS', '').split(',') if r]  # besides the default
+REGION_WORKERS = int(os.environ.get('SADRN_REGION_WORKERS', 0))  # 0 = every region in this process
+
+journal = Journal(JOURNAL_PATH) if JOURNAL_PATH else None
 
 # Topology Configuration
 SWITCHES = {
@@ -71,8 +104,20 @@ DISPLAY = {'id': 'display', 'name': 'Control Center', 'ip': '10.0.0.100',
            'connected_switches': ['s1', 's2', 's3'], 'current_data': []}
 
 # State
+def build_route_index():
+    """Reverse index: switch/link -> gateways whose route uses it"""
+    uplinks = defaultdict(set)
+    for gw_id, gw in GATEWAYS.items():
+        uplinks[gw['primary_switch']].add(gw_id)
+        uplinks[gw['backup_switch']].add(gw_id)
+    link_ids = {}
+    for link in SWITCH_LINKS:
+        link_ids[(link['source'], link['target'])] = link['id']
+        link_ids[(link['target'], link['source'])] = link['id']
+    return {'switches': defaultdict(set), 'links': defaultdict(set), 'uplinks': uplinks, 'link_ids': link_ids}
+
 def deepcopy_state():
-    return {
+    state = {
         'switches': {k: dict(v) for k, v in SWITCHES.items()},
         'switch_links': [dict(l) for l in SWITCH_LINKS],
         'gateways': {k: dict(v) for k, v in GATEWAYS.items()},
@@ -80,57 +125,226 @@ def deepcopy_state():
         'sensors': {k: dict(v) for k, v in SENSORS.items()},
         'display': {**DISPLAY, 'current_data': []},
         'current_intent': 'balanced',
-        'event_logs': [],
+        'event_logs': EventStore(EVENT_LOG_SIZE),
+        'sensor_history': TimeSeriesStore(HISTORY_SIZE),
         'routes': {},
         'auto_packets': True,
         'auto_intent': True,
-        'packet_stats': {'forwarded': 0, 'dropped': 0, 'total': 0}
+        'packet_stats': {'forwarded': 0, 'dropped': 0, 'total': 0},
+        'packet_counter': 0,
+        'packet_rr': 0,
+        'sensor_ids': tuple(SENSORS),
+        'route_index': build_route_index()
     }
+    state['status_index'] = StatusIndex(state['sensors'])
+    now = time.time()
+    for sensor_id, sensor in state['sensors'].items():
+        state['sensor_history'].append(sensor_id, now, sensor['value'])
+    return state
+
+# Keys readers see; everything else (index, counters) is engine-private
+SNAPSHOT_KEYS = ('switches', 'switch_links', 'gateways', 'gateway_links', 'sensors', 'display', 'routes',
+                 'current_intent', 'auto_intent', 'auto_packets', 'packet_stats')
 
-state = deepcopy_state()
-packet_counter = 0
+# Regions
+class Region:
+    """One independent disaster region: its own state engine (topology, routes, route
+    index), patch versioner, Socket.IO room, battery scheduler and background ticks.
+
+    Commands reach their region through state['region']. call/read/snapshot are the
+    interface views use; RemoteRegion offers the same for regions in worker processes.
+    """
+
+    def __init__(self, region_id, sio=None):
+        self.id = region_id
+        self.room = f'region:{region_id}'
+        self.broadcaster = Broadcaster(sio or socketio, tick=EMIT_TICK, room=self.room, encode=frame_codec.encoder())
+        self.versioner = StateVersioner()
+        # Route computation totals (engine thread only); replay tooling reads the deltas
+        self.route_stats = {'runs': 0, 'routes': 0, 'seconds': 0.0}
+        self.simulator = None
+        self.contingency = ReportCache()
+        state = deepcopy_state()
+        state['region'] = self
+        # All mutations run as commands on the engine thread; readers use engine.snapshot
+        self.engine = StateEngine(state, SNAPSHOT_KEYS)
+        self.broadcaster.schedule = self.engine.after_commit
+        self.broadcaster.register('state_patch', lambda: self.versioner.diff(self.engine.snapshot),
+                                  select=lambda patch, topics: patch_for_topics(self.engine.snapshot, patch, topics))
+        # Battery wake-ups only at predicted threshold crossings
+        self.crossings = CrossingScheduler(lambda switch_id: self.engine.submit(battery_crossing, switch_id))
+    
+    def start(self, background=True):
+        """Compute initial routes, take the first snapshot as patch baseline, start ticking"""
+        self.engine.call(recompute_all_routes)
+        self.engine.call(init_batteries)
+        self.versioner.rebase(self.engine.snapshot)
+        if background:
+            threading.Thread(target=self.auto_packet_sender, daemon=True).start()
+            threading.Thread(target=self.crossings.run, daemon=True).start()
+            self.broadcaster.socketio.start_background_task(self.broadcaster.run)
+    
+    def auto_packet_sender(self):
+        while True:
+            time.sleep(2.5)  # Slower rate
+            self.engine.submit(send_next_auto_packet)
+    
+    def call(self, fn, *args):
+        """Run a command fn(state, ...) on this region's engine"""
+        return self.engine.call(fn, *args)
+    
+    def read(self, fn, *args):
+        """Run a read-only fn(region, ...) next to the region's state"""
+        return fn(self, *args)
+    
+    def snapshot(self):
+        return self.engine.snapshot
+
+regions = {DEFAULT_REGION: Region(DEFAULT_REGION)}
+regions_lock = threading.Lock()
+region_workers = []
+
+# The default region under its old module-level names (tooling, single-region use)
+default_region = regions[DEFAULT_REGION]
+engine = default_region.engine
+broadcaster = default_region.broadcaster
+versioner = default_region.versioner
+crossings = default_region.crossings
+route_stats = default_region.route_stats
+
+def create_region(region_id):
+    """Create and start a region, in a worker process when SADRN_REGION_WORKERS is set"""
+    with regions_lock:
+        if region_id in regions:
+            return None
+        if REGION_WORKERS:
+            if not region_workers:
+                region_workers.extend(RegionWorker(Region) for _ in range(REGION_WORKERS))
+                for worker in region_workers:
+                    socketio.start_background_task(worker.pump, socketio)
+            region = RemoteRegion(region_id, region_workers[(len(regions) - 1) % REGION_WORKERS])
+        else:
+            region = Region(region_id)
+            region.start()
+        regions[region_id] = region
+        return region
 
 # Helpers
+def publish_state(state, urgent=False):
+    """Queue a state_patch with everything that changed since the last one"""
+    state['region'].broadcaster.touch('state_patch', urgent=urgent)
+
+def record_sensor(state, sensor):
+    state['sensor_history'].append(sensor['id'], time.time(), sensor['value'])
+
 def get_timestamp():
     return datetime.now().strftime("%H:%M:%S")
 
-def add_event_log(event_type, message, priority='INFO'):
-    log = {'timestamp': get_timestamp(), 'type': event_type, 'message': message, 'priority': priority}
-    state['event_logs'].insert(0, log)
-    state['event_logs'] = state['event_logs'][:50]
-    socketio.emit('event_log', log)
+def add_event_log(state, event_type, message, priority='INFO', topics=()):
+    log = state['event_logs'].append({'timestamp': get_timestamp(), 'type': event_type, 'message': message, 'priority': priority})
+    state['region'].broadcaster.emit('event_log', log, append=True, urgent=priority == 'CRITICAL', topics=topics)
     return log
 
+def sensor_topics(sensor):
+    """Subscription topics of a sensor's packets and events: zone, gateway, sensor"""
+    return (f"zone:{sensor['type']}", f"gateway:{sensor['gateway']}", f"sensor:{sensor['id']}")
+
+def gateway_topics(gw_id):
+    """A gateway's (and its route's) topics: the zones of its sensors, the gateway"""
+    gateway = GATEWAYS.get(gw_id, {'sensors': []})
+    return (*{f"zone:{SENSORS[s]['type']}" for s in gateway['sensors']}, f'gateway:{gw_id}')
+
+def switch_topics(snap, switch_id):
+    """A switch's topics: those of the gateways it uplinks or currently routes"""
+    topics = set()
+    for gw_id, gw in snap['gateways'].items():
+        route = snap['routes'].get(gw_id) or {}
+        if switch_id in (gw['primary_switch'], gw['backup_switch']) or switch_id in route.get('switches_path', ()):
+            topics.update(gateway_topics(gw_id))
+    return topics
+
+def patch_for_topics(snap, patch, topics):
+    """A state_patch cut down to the entities of these zone/gateway/sensor topics: sensors,
+    gateways and routes by their own topics, switches and links by the gateways they
+    uplink or route. Removals and values stay, and so do seq and base: a filtered client
+    gets every patch, possibly with no changes, so its chain never breaks"""
+    links = {link['id']: link for link in snap['switch_links']}
+    entity_topics = {
+        'sensors': lambda key: sensor_topics(SENSORS[key]) if key in SENSORS else (),
+        'gateways': gateway_topics,
+        'routes': gateway_topics,
+        'switches': lambda key: switch_topics(snap, key),
+        'switch_links': lambda key: switch_topics(snap, links[key]['source']) | switch_topics(snap, links[key]['target'])
+                                    if key in links else (),
+    }
+    changes = {}
+    for section, entities in patch['changes'].items():
+        topics_of = entity_topics.get(section)
+        picked = {key: entity for key, entity in entities.items()
+                  if topics_of is None or not topics.isdisjoint(topics_of(key))}
+        if picked:
+            changes[section] = picked
+    return {**patch, 'changes': changes}
+
 def classify_sensor_status(sensor):
     if sensor['value'] >= sensor['threshold_emergency']: return 'EMERGENCY'
     if sensor['value'] >= sensor['threshold_warning']: return 'WARNING'
     return 'NORMAL'
 
-def classify_gateway_priority(gateway_id):
-    gw = state['gateways'][gateway_id]
-    for sid in gw['sensors']:
-        s = state['sensors'][sid]
-        if s['status'] == 'EMERGENCY': return 'EMERGENCY'
-    for sid in gw['sensors']:
-        s = state['sensors'][sid]
-        if s['status'] == 'WARNING': return 'WARNING'
+def set_sensor_status(state, sensor, status):
+    """Change a sensor's status and keep the status counters in step"""
+    state['status_index'].update(sensor['id'], sensor['gateway'], sensor['status'], status)
+    sensor['status'] = status
+
+def classify_gateway_priority(state, gateway_id):
+    index = state['status_index']
+    if index.count('EMERGENCY', gateway_id): return 'EMERGENCY'
+    if index.count('WARNING', gateway_id): return 'WARNING'
     return 'NORMAL'
 
-def determine_auto_intent():
-    has_emergency = any(s['status'] == 'EMERGENCY' for s in state['sensors'].values())
-    has_warning = any(s['status'] == 'WARNING' for s in state['sensors'].values())
-    if has_emergency: return 'high_priority'
-    if has_warning: return 'low_latency'
+def determine_auto_intent(state):
+    index = state['status_index']
+    if index.count('EMERGENCY'): return 'high_priority'
+    if index.count('WARNING'): return 'low_latency'
     return 'balanced'
 
 # Routing - Unified Cost Function
-def get_battery_penalty(switch_id):
-    battery = state['switches'][switch_id].get('battery', 100)
+def battery_penalty(battery):
     if battery < 20: return 30
     if battery < 40: return 15
     return 0
 
-def get_active_graph():
+def get_battery_penalty(state, switch_id):
+    return battery_penalty(state['switches'][switch_id].get('battery', 100))
+
+# Battery Model - each switch drains along a line (battery at battery_at, drain_rate %/s)
+def drain_rate(state, switch_id):
+    """Idle draw plus forwarding load per route through the switch (%/s)"""
+    sw = state['switches'][switch_id]
+    if sw['status'] != 'active' or sw['battery'] <= 0:
+        return 0.0
+    return BATTERY_DRAIN * (0.5 + 0.3 * len(state['route_index']['switches'][switch_id])) / 30
+
+def rebase_battery(state, switch_id, level=None):
+    """Materialize the level (or set it) and restart the line at the current drain rate"""
+    sw = state['switches'][switch_id]
+    now = time.time()
+    sw['battery'] = round(project(sw, now) if level is None else level, 2)
+    sw['battery_at'] = now
+    sw['drain_rate'] = drain_rate(state, switch_id)
+    state['region'].crossings.schedule(switch_id, sw)
+
+def sync_drain(state, switch_ids):
+    """Rebase switches whose route load changed"""
+    for sw_id in switch_ids:
+        if drain_rate(state, sw_id) != state['switches'][sw_id].get('drain_rate'):
+            rebase_battery(state, sw_id)
+
+def init_batteries(state):
+    for sw_id in state['switches']:
+        rebase_battery(state, sw_id, state['switches'][sw_id]['battery'])
+
+def get_active_graph(state):
     """Build weighted graph with unified cost function"""
     graph = defaultdict(list)
     intent = state['current_intent']
@@ -149,8 +363,8 @@ def get_active_graph():
         
         # Unified cost = latency_weight * latency + battery_weight * battery_penalty
         latency = link['latency']
-        battery_penalty = (get_battery_penalty(link['source']) + get_battery_penalty(link['target'])) / 2
-        cost = lat_w * latency + bat_w * battery_penalty
+        penalty = (get_battery_penalty(state, link['source']) + get_battery_penalty(state, link['target'])) / 2
+        cost = lat_w * latency + bat_w * penalty
         
         graph[link['source']].append((link['target'], max(cost, 0.1)))
         graph[link['target']].append((link['source'], max(cost, 0.1)))
@@ -158,10 +372,8 @@ def get_active_graph():
     return graph
 
 def dijkstra(graph, start, end_nodes):
-    all_nodes = set(state['switches'].keys())
-    dists = {n: float('inf') for n in all_nodes}
-    dists[start] = 0
-    prev = {n: None for n in all_nodes}
+    dists = {start: 0}
+    prev = {start: None}
     pq, visited = [(0, start)], set()
     
     while pq:
@@ -173,30 +385,35 @@ def dijkstra(graph, start, end_nodes):
             while cur: path.append(cur); cur = prev[cur]
             return path[::-1], d
         for nb, w in graph.get(cur, []):
-            if nb not in visited and d + w < dists[nb]:
+            if nb not in visited and d + w < dists.get(nb, float('inf')):
                 dists[nb] = d + w
                 prev[nb] = cur
                 heapq.heappush(pq, (dists[nb], nb))
     return None, float('inf')
 
-def compute_route(gateway_id, priority='NORMAL'):
+def select_uplink(state, gateway_id):
     gw = state['gateways'][gateway_id]
-    display_switches = set(state['display']['connected_switches'])
-    graph = get_active_graph()
-    
-    # Determine start switch
     primary = gw['primary_switch']
     backup = gw['backup_switch']
     primary_ok = state['switches'][primary]['status'] == 'active'
     backup_ok = state['switches'][backup]['status'] == 'active'
     
     if primary_ok and state['switches'][primary].get('battery', 100) >= 15:
-        start = primary
-    elif backup_ok:
-        start = backup
-    elif primary_ok:
-        start = primary
-    else:
+        return primary
+    if backup_ok:
+        return backup
+    if primary_ok:
+        return primary
+    return None
+
+def compute_route(state, gateway_id, priority='NORMAL', graph=None):
+    display_switches = set(state['display']['connected_switches'])
+    if graph is None:
+        graph = get_active_graph(state)
+    
+    # Determine start switch
+    start = select_uplink(state, gateway_id)
+    if start is None:
         return None, 'No uplinks'
     
     state['gateways'][gateway_id]['active_uplink'] = start
@@ -215,125 +432,310 @@ def compute_route(gateway_id, priority='NORMAL'):
         'reason': f'{state["current_intent"]} routing'
     }, None
 
-def recompute_all_routes():
-    for gw_id in state['gateways']:
-        route, _ = compute_route(gw_id, state['gateways'][gw_id]['priority'])
+# Route Index
+def route_link_ids(state, switches_path):
+    link_ids = state['route_index']['link_ids']
+    return [link_ids[hop] for hop in zip(switches_path, switches_path[1:]) if hop in link_ids]
+
+def set_route(state, gw_id, route):
+    """Store a gateway route and keep the switch/link reverse index in sync"""
+    index = state['route_index']
+    old = state['routes'].get(gw_id)
+    if old:
+        for sw_id in old['switches_path']:
+            index['switches'][sw_id].discard(gw_id)
+        for link_id in route_link_ids(state, old['switches_path']):
+            index['links'][link_id].discard(gw_id)
+    state['routes'][gw_id] = route
+    for sw_id in route['switches_path']:
+        index['switches'][sw_id].add(gw_id)
+    for link_id in route_link_ids(state, route['switches_path']):
+        index['links'][link_id].add(gw_id)
+    sync_drain(state, set(old['switches_path'] if old else ()) ^ set(route['switches_path']))
+
+def gateways_using_switch(state, switch_id):
+    """Gateways whose route or uplink choice depends on a switch"""
+    index = state['route_index']
+    return index['switches'][switch_id] | index['uplinks'][switch_id]
+
+def gateways_using_link(state, link_id):
+    return set(state['route_index']['links'][link_id])
+
+def recompute_routes(state, gw_ids):
+    """Recompute routes for the given gateways over one shared graph"""
+    if not gw_ids:
+        return
+    started = time.perf_counter()
+    graph = get_active_graph(state)
+    for gw_id in list(gw_ids):
+        route, _ = compute_route(state, gw_id, state['gateways'][gw_id]['priority'], graph)
         if route:
-            state['routes'][gw_id] = route
+            set_route(state, gw_id, route)
+    stats = state['region'].route_stats
+    stats['runs'] += 1
+    stats['routes'] += len(gw_ids)
+    stats['seconds'] += time.perf_counter() - started
 
-# API Routes
-@app.route('/api/topology', methods=['GET'])
-def get_topology():
-    return jsonify({
-        'switches': state['switches'],
-        'switch_links': state['switch_links'],
-        'gateways': state['gateways'],
-        'gateway_links': state['gateway_links'],
-        'sensors': state['sensors'],
-        'display': state['display'],
-        'routes': state['routes'],
-        'intent': state['current_intent'],
-        'auto_packets': state['auto_packets'],
-        'packet_stats': state['packet_stats']
-    })
+def recompute_all_routes(state):
+    recompute_routes(state, list(state['gateways']))
 
-@app.route('/api/sensors/<sensor_id>', methods=['PUT'])
-def update_sensor(sensor_id):
-    if sensor_id not in state['sensors']:
-        return jsonify({'error': 'Not found'}), 404
-    
-    data = request.json
-    sensor = state['sensors'][sensor_id]
-    old_status = sensor['status']
-    
-    if 'value' in data:
-        sensor['value'] = max(0, min(100, int(data['value'])))
-    sensor['status'] = classify_sensor_status(sensor)
+# What-if - hypothetical changes on a fork of the published snapshot; live state is never touched
+WHATIF_FIELDS = {'switches': {'status': ('active', 'failed'), 'battery': None}, 'links': {'status': ('active', 'failed')}}
+
+def fork_state(snap, changes):
+    """Structural-sharing copy of a frozen snapshot: only changed entities are rebuilt"""
+    fork = dict(snap)
+    for sw_id, fields in changes.get('switches', {}).items():
+        fork['switches'] = assoc(fork['switches'], sw_id, FrozenDict({**fork['switches'][sw_id], **fields}))
+    links = changes.get('links', {})
+    if links:
+        fork['switch_links'] = tuple(FrozenDict({**link, **links[link['id']]}) if link['id'] in links else link
+                                     for link in fork['switch_links'])
+    if changes.get('intent'):
+        fork['current_intent'] = changes['intent']
+    # compute_route records the chosen uplink on the gateway, the one section routing writes
+    fork['gateways'] = {k: dict(v) for k, v in snap['gateways'].items()}
+    return fork
+
+def fork_routes(fork):
+    """Route every gateway on a fork over one graph: {gw_id: (route, reason)}"""
+    graph = get_active_graph(fork)
+    return {gw_id: compute_route(fork, gw_id, gw['priority'], graph) for gw_id, gw in fork['gateways'].items()}
+
+def route_summary(route):
+    return {'path': list(route['path']), 'cost': route['cost']} if route else None
+
+def parse_whatif(snap, data):
+    """Validated changes, or (None, error)"""
+    if not isinstance(data, dict):
+        return None, 'Expected an object of changes'
+    changes = {}
+    known = {'switches': snap['switches'], 'links': {link['id'] for link in snap['switch_links']}}
+    for section, allowed in WHATIF_FIELDS.items():
+        entries = data.get(section, {})
+        if not isinstance(entries, dict):
+            return None, f'{section} must be an object'
+        for entity_id, fields in entries.items():
+            if entity_id not in known[section]:
+                return None, f'Unknown id {entity_id} in {section}'
+            fields = fields if isinstance(fields, dict) else {'status': fields}
+            for field, value in fields.items():
+                if field not in allowed:
+                    return None, f'Cannot change {field} of {entity_id}'
+                if field == 'battery':
+                    try:
+                        fields = {**fields, 'battery': max(0.0, min(100.0, float(value)))}
+                    except (TypeError, ValueError):
+                        return None, f'Invalid battery for {entity_id}'
+                elif value not in allowed[field]:
+                    return None, f'Invalid {field} for {entity_id}'
+            changes.setdefault(section, {})[entity_id] = fields
+    intent = data.get('intent')
+    if intent is not None:
+        if intent not in ('high_priority', 'low_latency', 'balanced'):
+            return None, 'Invalid intent'
+        changes['intent'] = intent
+    return changes, None
+
+def what_if(region, data):
+    """Routes and costs after hypothetical changes, diffed against the live routes. Returns (payload, status)"""
+    snap = region.engine.snapshot
+    changes, error = parse_whatif(snap, data)
+    if error:
+        return {'error': error}, 400
+    started = time.perf_counter()
+    results = fork_routes(fork_state(snap, changes))
+    routes, unrouted = {}, []
+    for gw_id, (route, reason) in results.items():
+        before, after = route_summary(snap['routes'].get(gw_id)), route_summary(route)
+        routes[gw_id] = {'before': before, 'after': after, 'changed': before != after}
+        if not route:
+            routes[gw_id]['reason'] = reason
+            unrouted.append(gw_id)
+        elif before:
+            routes[gw_id]['cost_delta'] = round(after['cost'] - before['cost'], 2)
+    return {'changes': changes, 'routes': routes, 'unrouted': unrouted,
+            'changed': [gw_id for gw_id, r in routes.items() if r['changed']],
+            'ms': round((time.perf_counter() - started) * 1000, 3)}, 200
+
+# Contingency - every single switch/link failure evaluated on forks (see contingency.py)
+def routing_version(snap):
+    """Hash of everything routes depend on: statuses, battery bands, intent, gateway priorities"""
+    return hashlib.blake2b(repr((
+        snap['current_intent'],
+        tuple((k, sw['status'], battery_penalty(sw.get('battery', 100)), sw.get('battery', 100) >= 15)
+              for k, sw in snap['switches'].items()),
+        tuple((link['id'], link['status']) for link in snap['switch_links']),
+        tuple((k, gw['priority']) for k, gw in snap['gateways'].items()))).encode(), digest_size=6).hexdigest()
+
+CASE_SECTIONS = {'switch': 'switches', 'link': 'links'}
+
+def contingency_case(base, case):
+    """One N-1 case (kind, id) against base (snap, routes before); runs in pool processes"""
+    snap, before = base
+    kind, element = case
+    results = fork_routes(fork_state(snap, {CASE_SECTIONS[kind]: {element: {'status': 'failed'}}}))
+    unrouted, rerouted, cost_delta = [], [], {}
+    for gw_id, (route, _) in results.items():
+        if not route:
+            unrouted.append(gw_id)
+            continue
+        old = before.get(gw_id)
+        if old and old['path'] != route['path']:
+            rerouted.append(gw_id)
+        cost_delta[gw_id] = round(route['cost'] - old['cost'], 2) if old else 0.0
+    return {'kind': kind, 'element': element, 'unrouted': unrouted, 'rerouted': rerouted,
+            'cost_delta': cost_delta, 'max_cost_delta': max(cost_delta.values(), default=0.0)}
+
+def contingency_report(region, procs=None):
+    """Ranked N-1 report for the region's current topology, cached by routing version"""
+    snap = region.engine.snapshot
+    version = routing_version(snap)
+    report = region.contingency.get(version)
+    if report is not None:
+        return {**report, 'cached': True}
+    started = time.perf_counter()
+    before = {gw_id: route_summary(route) for gw_id, (route, _) in fork_routes(fork_state(snap, {})).items()}
+    cases = [('switch', sw_id) for sw_id, sw in snap['switches'].items() if sw['status'] == 'active']
+    cases += [('link', link['id']) for link in snap['switch_links'] if link['status'] == 'active']
+    results, used = run_cases(contingency_case, (snap, before), cases, procs)
+    ranked = rank(results)
+    report = {'version': version, 'procs': used, 'ms': round((time.perf_counter() - started) * 1000, 3),
+              'unrouted_now': [gw_id for gw_id, route in before.items() if not route],
+              'critical': [r['element'] for r in ranked if r['unrouted']], 'cases': ranked}
+    region.contingency.put(version, report)
+    return {**report, 'cached': False}
+
+def snapshot_payload(region):
+    """Full state for (re)syncing clients, tagged with the patch seq it matches"""
+    # Read seq first: the snapshot taken after it is never older than that seq's baseline
+    seq = region.versioner.seq
+    return {**topology_payload(region.engine.snapshot), 'seq': seq}
+
+def topology_payload(snap):
+    now = time.time()
+    return {
+        'switches': {k: {**sw, 'battery': round(project(sw, now), 2), 'battery_at': now}
+                     for k, sw in snap['switches'].items()},
+        'switch_links': snap['switch_links'],
+        'gateways': snap['gateways'],
+        'gateway_links': snap['gateway_links'],
+        'sensors': snap['sensors'],
+        'display': snap['display'],
+        'routes': snap['routes'],
+        'intent': snap['current_intent'],
+        'auto_packets': snap['auto_packets'],
+        'packet_stats': snap['packet_stats']
+    }
+
+def not_found():
+    return jsonify({'error': 'Not found'}), 404
+
+# Commands - run on the engine thread as fn(state, ...)
+def apply_sensor_update(state, sensor_id, data):
+    result = apply_sensor_batch(state, {sensor_id: data})
+    return result['sensors'].get(sensor_id)
+
+def apply_sensor_batch(state, updates):
+    """Apply many sensor values, then evaluate priorities and intent once"""
+    applied, unknown, gateways = {}, [], set()
     
-    gw_id = sensor['gateway']
-    state['gateways'][gw_id]['priority'] = classify_gateway_priority(gw_id)
+    for sensor_id, data in updates.items():
+        if sensor_id not in state['sensors']:
+            unknown.append(sensor_id)
+            continue
+        sensor = state['sensors'][sensor_id]
+        old_status = sensor['status']
+        
+        if 'value' in data:
+            sensor['value'] = max(0, min(100, int(data['value'])))
+            record_sensor(state, sensor)
+        set_sensor_status(state, sensor, classify_sensor_status(sensor))
+        gateways.add(sensor['gateway'])
+        
+        if sensor['status'] != old_status:
+            add_event_log(state, 'SENSOR', f'{sensor["name"]}: {old_status} → {sensor["status"]}', 
+                          'CRITICAL' if sensor['status'] == 'EMERGENCY' else 'WARNING' if sensor['status'] == 'WARNING' else 'INFO',
+                          sensor_topics(sensor))
+        applied[sensor_id] = sensor
     
-    if sensor['status'] != old_status:
-        add_event_log('SENSOR', f'{sensor["name"]}: {old_status} → {sensor["status"]}', 
-                      'CRITICAL' if sensor['status'] == 'EMERGENCY' else 'WARNING' if sensor['status'] == 'WARNING' else 'INFO')
+    for gw_id in gateways:
+        state['gateways'][gw_id]['priority'] = classify_gateway_priority(state, gw_id)
     
     # Update intent (auto mode only)
     old_intent = state['current_intent']
     if state.get('auto_intent', True):
-        state['current_intent'] = determine_auto_intent()
+        state['current_intent'] = determine_auto_intent(state)
     if old_intent != state['current_intent']:
-        add_event_log('INTENT', f'Intent changed to {state["current_intent"]}', 'WARNING')
-        recompute_all_routes()
+        add_event_log(state, 'INTENT', f'Intent changed to {state["current_intent"]}', 'WARNING')
+        recompute_all_routes(state)
     
-    socketio.emit('sensor_update', {'sensor': sensor, 'gateway': state['gateways'][gw_id], 'routes': state['routes'], 'intent': state['current_intent']})
-    return jsonify(sensor)
+    if applied:
+        publish_state(state, urgent=any(s['status'] == 'EMERGENCY' for s in applied.values()))
+    return {'sensors': {k: dict(v) for k, v in applied.items()}, 'unknown': unknown,
+            'intent': state['current_intent']}
 
-@app.route('/api/switches/<switch_id>/battery', methods=['PUT'])
-def update_switch_battery(switch_id):
+def apply_switch_battery(state, switch_id, data):
     if switch_id not in state['switches']:
-        return jsonify({'error': 'Not found'}), 404
-    
-    data = request.json
+        return None
+    old_battery = state['switches'][switch_id]['battery']
+    return set_switch_battery(state, switch_id, max(0, min(100, int(data.get('battery', old_battery)))))
+
+def battery_crossing(state, switch_id):
+    """Scheduled wake-up: the switch's projected level just crossed a threshold"""
+    return set_switch_battery(state, switch_id, project(state['switches'][switch_id], time.time()))
+
+def set_switch_battery(state, switch_id, new_battery):
     old_battery = state['switches'][switch_id]['battery']
-    new_battery = max(0, min(100, int(data.get('battery', old_battery))))
-    state['switches'][switch_id]['battery'] = new_battery
+    rebase_battery(state, switch_id, new_battery)
+    new_battery = state['switches'][switch_id]['battery']
     
     if old_battery >= 20 > new_battery:
-        add_event_log('BATTERY', f'{switch_id.upper()} CRITICAL ({new_battery}%)', 'CRITICAL')
+        add_event_log(state, 'BATTERY', f'{switch_id.upper()} CRITICAL ({new_battery:g}%)', 'CRITICAL')
+    if old_battery > 0 >= new_battery:
+        add_event_log(state, 'BATTERY', f'{switch_id.upper()} battery depleted', 'CRITICAL')
     
-    recompute_all_routes()
-    socketio.emit('topology_update', {'switches': state['switches'], 'routes': state['routes']})
-    return jsonify(state['switches'][switch_id])
+    # Routing only sees the penalty band and the uplink threshold. A drop can only
+    # worsen paths through this switch; a rise may attract any route.
+    old_band = (battery_penalty(old_battery), old_battery >= 15)
+    new_band = (battery_penalty(new_battery), new_battery >= 15)
+    if new_band != old_band:
+        if new_battery < old_battery:
+            recompute_routes(state, gateways_using_switch(state, switch_id))
+        else:
+            recompute_all_routes(state)
+    publish_state(state)
+    return dict(state['switches'][switch_id])
 
-@app.route('/api/switches/<switch_id>/fail', methods=['POST'])
-def fail_switch(switch_id):
-    if switch_id not in state['switches']:
-        return jsonify({'error': 'Not found'}), 404
-    state['switches'][switch_id]['status'] = 'failed'
-    add_event_log('FAILURE', f'{switch_id.upper()} FAILED', 'CRITICAL')
-    recompute_all_routes()
-    socketio.emit('topology_update', {'switches': state['switches'], 'routes': state['routes'], 'gateways': state['gateways']})
-    return jsonify(state['switches'][switch_id])
-
-@app.route('/api/switches/<switch_id>/restore', methods=['POST'])
-def restore_switch(switch_id):
+def apply_switch_status(state, switch_id, status):
     if switch_id not in state['switches']:
-        return jsonify({'error': 'Not found'}), 404
-    state['switches'][switch_id]['status'] = 'active'
-    add_event_log('RESTORE', f'{switch_id.upper()} restored', 'INFO')
-    recompute_all_routes()
-    socketio.emit('topology_update', {'switches': state['switches'], 'routes': state['routes'], 'gateways': state['gateways']})
-    return jsonify(state['switches'][switch_id])
-
-@app.route('/api/links/<link_id>/fail', methods=['POST'])
-def fail_link(link_id):
-    for link in state['switch_links']:
-        if link['id'] == link_id:
-            link['status'] = 'failed'
-            add_event_log('FAILURE', f'Link {link["source"]}-{link["target"]} FAILED', 'CRITICAL')
-            recompute_all_routes()
-            socketio.emit('topology_update', {'switch_links': state['switch_links'], 'routes': state['routes']})
-            return jsonify(link)
-    return jsonify({'error': 'Not found'}), 404
+        return None
+    state['switches'][switch_id]['status'] = status
+    rebase_battery(state, switch_id)
+    if status == 'failed':
+        add_event_log(state, 'FAILURE', f'{switch_id.upper()} FAILED', 'CRITICAL')
+        recompute_routes(state, gateways_using_switch(state, switch_id))
+    else:
+        add_event_log(state, 'RESTORE', f'{switch_id.upper()} restored', 'INFO')
+        recompute_all_routes(state)
+    publish_state(state)
+    return dict(state['switches'][switch_id])
 
-@app.route('/api/links/<link_id>/restore', methods=['POST'])
-def restore_link(link_id):
+def apply_link_status(state, link_id, status):
     for link in state['switch_links']:
         if link['id'] == link_id:
-            link['status'] = 'active'
-            add_event_log('RESTORE', f'Link {link["source"]}-{link["target"]} restored', 'INFO')
-            recompute_all_routes()
-            socketio.emit('topology_update', {'switch_links': state['switch_links'], 'routes': state['routes']})
-            return jsonify(link)
-    return jsonify({'error': 'Not found'}), 404
-
-@app.route('/api/intent', methods=['GET'])
-def get_intent():
-    return jsonify({"intent": state["current_intent"], "auto_intent": state.get("auto_intent", True)})
+            link['status'] = status
+            if status == 'failed':
+                add_event_log(state, 'FAILURE', f'Link {link["source"]}-{link["target"]} FAILED', 'CRITICAL')
+                recompute_routes(state, gateways_using_link(state, link_id))
+            else:
+                add_event_log(state, 'RESTORE', f'Link {link["source"]}-{link["target"]} restored', 'INFO')
+                recompute_all_routes(state)
+            publish_state(state)
+            return dict(link)
+    return None
 
-@app.route("/api/intent", methods=["PUT"])
-def set_intent():
-    data = request.json
+def apply_intent(state, data):
     new_intent = data.get("intent")
     auto = data.get("auto", None)
     
@@ -344,158 +746,469 @@ def set_intent():
         old_intent = state["current_intent"]
         state["current_intent"] = new_intent
         if old_intent != new_intent:
-            add_event_log("INTENT", f"Manual intent: {new_intent}", "WARNING")
-            recompute_all_routes()
+            add_event_log(state, "INTENT", f"Manual intent: {new_intent}", "WARNING")
+            recompute_all_routes(state)
+    
+    publish_state(state)
+    return {"intent": state["current_intent"], "auto_intent": state.get("auto_intent", True)}
+
+def toggle_auto_packets_state(state):
+    state['auto_packets'] = not state['auto_packets']
+    publish_state(state)
+    return {'auto_packets': state['auto_packets']}
+
+def reset_state(state):
+    """Rebuild the simulation in place; the event store and its ids carry over"""
+    region = state['region']
+    events = state['event_logs']
+    events.clear()
+    fresh = deepcopy_state()
+    fresh['region'] = region
+    fresh['event_logs'] = events
+    # History spans resets: the defaults are recorded as new samples
+    fresh['sensor_history'] = state['sensor_history']
+    for sensor in fresh['sensors'].values():
+        record_sensor(fresh, sensor)
+    # Assign key by key so concurrent readers of engine.state never miss a key
+    for key, value in fresh.items():
+        state[key] = value
+    region.crossings.clear()
+    recompute_all_routes(state)
+    init_batteries(state)
+    add_event_log(state, 'SYSTEM', 'Simulation reset', 'INFO')
+    
+    def announce():
+        region.broadcaster.flush()  # pre-reset updates must not land after the reset
+        region.versioner.rebase(region.engine.snapshot)
+        snap = region.engine.snapshot
+        region.broadcaster.emit('simulation_reset', {**snapshot_payload(region), 'current_intent': snap['current_intent'],
+                                                     'auto_intent': snap['auto_intent'], 'event_logs': events.query()},
+                                urgent=True)
+    region.engine.after_commit(announce)
+    return {'message': 'Reset'}
+
+def send_next_auto_packet(state):
+    """One auto_packet_sender tick: pick a sensor, emergencies first"""
+    if not state['auto_packets']:
+        return None
+    
+    # Round-robin through sensors, prioritize emergencies
+    index = state['status_index']
+    if index.count('EMERGENCY'):
+        sensor_id = index.choice('EMERGENCY')
+    elif index.count('WARNING') and random.random() < 0.6:
+        sensor_id = index.choice('WARNING')
+    else:
+        sensor_ids = state['sensor_ids']
+        sensor_id = sensor_ids[state['packet_rr'] % len(sensor_ids)]
+        state['packet_rr'] += 1
+    
+    return send_auto_packet(state, sensor_id)
+
+def send_auto_packet(state, sensor_id):
+    """Route one simulated packet from a sensor and publish it"""
+    sensor = state['sensors'][sensor_id]
+    gw_id = sensor['gateway']
+    route, err = compute_route(state, gw_id, sensor['status'])
+    
+    state['packet_stats']['total'] += 1
+    broadcaster = state['region'].broadcaster
     
-    socketio.emit("intent_update", {"intent": state["current_intent"], "auto_intent": state.get("auto_intent", True), "routes": state["routes"]})
-    return jsonify({"intent": state["current_intent"], "auto_intent": state.get("auto_intent", True)})
+    if err:
+        state['packet_stats']['dropped'] += 1
+        broadcaster.emit('packet_stats', dict(state['packet_stats']))
+        return None
+    
+    state['packet_stats']['forwarded'] += 1
+    set_route(state, gw_id, route)
+    state['packet_counter'] += 1
+    
+    # Update display
+    display_data = {
+        'sensor_id': sensor_id,
+        'sensor_name': sensor['name'],
+        'value': sensor['value'],
+        'unit': sensor['unit'],
+        'priority': sensor['status'],
+        'timestamp': get_timestamp()
+    }
+    state['display']['current_data'].insert(0, display_data)
+    state['display']['current_data'] = state['display']['current_data'][:4]
+    
+    packet = {
+        'id': f'pkt_{state["packet_counter"]}',
+        'sensor_id': sensor_id,
+        'gateway_id': gw_id,
+        'priority': sensor['status'],
+        'path': route['path'],
+        'data': {'type': sensor['type'], 'value': sensor['value'], 'unit': sensor['unit'], 'sensor_name': sensor['name']},
+        'cost': route['cost'],
+        'timestamp': get_timestamp()
+    }
+    
+    broadcaster.emit('new_packet', packet, append=True, urgent=sensor['status'] == 'EMERGENCY',
+                     topics=sensor_topics(sensor))
+    broadcaster.emit('packet_stats', dict(state['packet_stats']))
+    broadcaster.emit('display_update', {**state['display'], 'current_data': list(state['display']['current_data'])})
+    return packet
+
+# Journal - every state-changing API call, replayable with benchmarks/replay_journal.py
+@app.before_request
+def journal_start():
+    g.arrived = time.time()
+
+@app.after_request
+def journal_request(response):
+    if journal and request.method in ('PUT', 'POST', 'DELETE') and request.path.startswith('/api/'):
+        journal.record({'t': round(g.get('arrived', time.time()), 6), 'kind': 'http', 'method': request.method,
+                        'path': request.path, 'body': request.get_json(silent=True), 'status': response.status_code})
+    return response
+
+# Region reads - run as fn(region, ...) next to the region's state (also in workers)
+def battery_report(region):
+    """Projected battery per switch with seconds to each threshold and predicted depletion"""
+    now = time.time()
+    result = {}
+    for sw_id, sw in region.engine.snapshot['switches'].items():
+        eta = predict(sw, now)
+        result[sw_id] = {
+            'battery': round(project(sw, now), 2),
+            'status': sw['status'],
+            'drain_rate': round(sw.get('drain_rate', 0) * 60, 3),  # %/min
+            'eta': {str(t): v for t, v in eta.items()},
+            'depletes_at': round(now + eta[0], 1) if eta[0] is not None else None,
+            'next_wakeup': region.crossings.next_crossing(sw_id)
+        }
+    return result
+
+def query_events(region, after, limit, types, priorities):
+    # EventStore locks internally and survives resets, so it is read directly
+    return region.engine.state['event_logs'].query(after=after, limit=limit, types=types, priorities=priorities)
+
+def query_history(region, sensor_id, t_from, t_to, points, mode):
+    ts, values = region.engine.state['sensor_history'].query(sensor_id, t_from, t_to)
+    series = DOWNSAMPLERS[mode](ts, values, points)
+    return {
+        'from': t_from if t_from is not None else (ts[0] if ts else None),
+        'to': t_to if t_to is not None else (ts[-1] if ts else None),
+        'samples': len(ts), 'points': [[round(t, 3), v] for t, v in series]
+    }
+
+def sim_stats(region):
+    return region.simulator.stats() if region.simulator else {'running': False}
+
+def start_simulation(region, data):
+    """Returns (payload, status)"""
+    if region.simulator and region.simulator.running:
+        return {'error': 'Simulation already running'}, 409
+    try:
+        region.simulator = PacketSimulator(
+            region.snapshot, emit=region.broadcaster.emit,
+            rate=float(data.get('rate', 100)), rates={k: float(v) for k, v in data.get('rates', {}).items()},
+            speed=float(data.get('speed', 1)),
+            duration=float(data['duration']) if data.get('duration') is not None else None,
+            switch_capacity=float(data.get('switch_capacity', 50000)), queue_limit=int(data.get('queue_limit', 1000)),
+            sample_every=float(data.get('sample_every', 0.5))).start()
+    except (AttributeError, TypeError, ValueError, ZeroDivisionError):
+        return {'error': 'Invalid simulation parameters'}, 400
+    region.call(add_event_log, 'SYSTEM', f"Traffic simulation started ({region.simulator.rate:g} pkt/s per sensor)", 'INFO')
+    return region.simulator.stats(), 200
+
+def stop_simulation(region):
+    if region.simulator:
+        region.simulator.stop()
+    return sim_stats(region)
+
+# API Routes - mounted at /api (default region) and /api/regions/<region_id>
+api = Blueprint('api', __name__)
+
+@api.url_value_preprocessor
+def pop_region(endpoint, values):
+    g.region_id = values.pop('region_id', DEFAULT_REGION) if values else DEFAULT_REGION
+
+@api.before_request
+def load_region():
+    g.region = regions.get(g.region_id)
+    if g.region is None:
+        return not_found()
+
+@api.route('/topology', methods=['GET'])
+def get_topology():
+    return jsonify(topology_payload(g.region.snapshot()))
+
+@api.route('/sensors/<sensor_id>', methods=['PUT'])
+def update_sensor(sensor_id):
+    sensor = g.region.call(apply_sensor_update, sensor_id, request.json)
+    return jsonify(sensor) if sensor else not_found()
+
+@api.route('/sensors/<sensor_id>/history', methods=['GET'])
+def get_sensor_history(sensor_id):
+    """?from=&to= (epoch s, negative = seconds ago) &points= (default 500) &mode=lttb|minmax"""
+    sensor = g.region.snapshot()['sensors'].get(sensor_id)
+    if not sensor:
+        return not_found()
+    t_from, t_to = request.args.get('from', type=float), request.args.get('to', type=float)
+    points = max(3, min(HISTORY_SIZE, request.args.get('points', 500, type=int)))
+    mode = request.args.get('mode', 'lttb')
+    if mode not in DOWNSAMPLERS:
+        return jsonify({'error': f'mode must be one of {", ".join(DOWNSAMPLERS)}'}), 400
+    now = time.time()
+    t_from = now + t_from if t_from is not None and t_from < 0 else t_from
+    t_to = now + t_to if t_to is not None and t_to < 0 else t_to
+    history = g.region.read(query_history, sensor_id, t_from, t_to, points, mode)
+    return jsonify({'sensor_id': sensor_id, 'unit': sensor['unit'], 'mode': mode, **history})
+
+@api.route('/sensors', methods=['PUT'])
+def update_sensors():
+    """Bulk update: {"<sensor_id>": {"value": v}, ...} or {"<sensor_id>": v, ...}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected an object of sensor updates'}), 400
+    updates = {}
+    for sensor_id, update in data.items():
+        update = update if isinstance(update, dict) else {'value': update}
+        # Validate everything up front so a batch is applied all or nothing
+        try:
+            updates[sensor_id] = {'value': int(update['value'])} if 'value' in update else {}
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Invalid value for {sensor_id}'}), 400
+    return jsonify(g.region.call(apply_sensor_batch, updates))
+
+@api.route('/switches/<switch_id>/battery', methods=['PUT'])
+def update_switch_battery(switch_id):
+    switch = g.region.call(apply_switch_battery, switch_id, request.json)
+    return jsonify(switch) if switch else not_found()
+
+@api.route('/batteries', methods=['GET'])
+def get_batteries():
+    return jsonify(g.region.read(battery_report))
+
+@api.route('/switches/<switch_id>/fail', methods=['POST'])
+def fail_switch(switch_id):
+    switch = g.region.call(apply_switch_status, switch_id, 'failed')
+    return jsonify(switch) if switch else not_found()
+
+@api.route('/switches/<switch_id>/restore', methods=['POST'])
+def restore_switch(switch_id):
+    switch = g.region.call(apply_switch_status, switch_id, 'active')
+    return jsonify(switch) if switch else not_found()
+
+@api.route('/links/<link_id>/fail', methods=['POST'])
+def fail_link(link_id):
+    link = g.region.call(apply_link_status, link_id, 'failed')
+    return jsonify(link) if link else not_found()
+
+@api.route('/links/<link_id>/restore', methods=['POST'])
+def restore_link(link_id):
+    link = g.region.call(apply_link_status, link_id, 'active')
+    return jsonify(link) if link else not_found()
+
+@api.route('/intent', methods=['GET'])
+def get_intent():
+    snap = g.region.snapshot()
+    return jsonify({"intent": snap["current_intent"], "auto_intent": snap["auto_intent"]})
+
+@api.route("/intent", methods=["PUT"])
+def set_intent():
+    return jsonify(g.region.call(apply_intent, request.json))
 
-@app.route('/api/routes', methods=['GET'])
+@api.route('/routes', methods=['GET'])
 def get_routes():
-    return jsonify(state['routes'])
+    return jsonify(g.region.snapshot()['routes'])
 
-@app.route('/api/events', methods=['GET'])
+@api.route('/events', methods=['GET'])
 def get_events():
-    return jsonify(state['event_logs'])
+    after = request.args.get('after', type=int)
+    limit = max(1, min(EVENT_LOG_SIZE, request.args.get('limit', 50, type=int)))
+    types = request.args.get('type')
+    priorities = request.args.get('priority')
+    return jsonify(g.region.read(query_events, after, limit,
+                                 set(types.split(',')) if types else None,
+                                 set(priorities.split(',')) if priorities else None))
+
+@api.route('/whatif', methods=['POST'])
+def post_whatif():
+    """Body: {"switches": {id: {"status"|"battery": v}}, "links": {id: {"status": v}}, "intent": i}"""
+    payload, status = g.region.read(what_if, request.get_json(silent=True))
+    return jsonify(payload), status
+
+@api.route('/contingency', methods=['GET'])
+def get_contingency():
+    """Ranked N-1 report: gateways left unrouted or with a cost jump per single failure. ?procs= pool size"""
+    procs = request.args.get('procs', type=int)
+    return jsonify(g.region.read(contingency_report, max(1, procs) if procs else None))
 
-@app.route('/api/packet_stats', methods=['GET'])
+@api.route('/packet_stats', methods=['GET'])
 def get_packet_stats():
-    return jsonify(state['packet_stats'])
+    return jsonify(g.region.snapshot()['packet_stats'])
 
-@app.route('/api/auto_packets', methods=['POST'])
+@api.route('/auto_packets', methods=['POST'])
 def toggle_auto_packets():
-    state['auto_packets'] = not state['auto_packets']
-    socketio.emit('auto_packets_update', {'enabled': state['auto_packets']})
-    return jsonify({'auto_packets': state['auto_packets']})
+    return jsonify(g.region.call(toggle_auto_packets_state))
 
-@app.route('/api/reset', methods=['POST'])
+@api.route('/reset', methods=['POST'])
 def reset_simulation():
-    global state, packet_counter
-    state = deepcopy_state()
-    packet_counter = 0
-    recompute_all_routes()
-    add_event_log('SYSTEM', 'Simulation reset', 'INFO')
-    socketio.emit('simulation_reset', {**state, 'intent': state['current_intent']})
-    return jsonify({'message': 'Reset'})
-
-# WebSocket
+    return jsonify(g.region.call(reset_state))
+
+# Traffic simulation (reads the region's engine snapshots on its own thread)
+@api.route('/sim', methods=['GET'])
+def get_sim_stats():
+    return jsonify(g.region.read(sim_stats))
+
+@api.route('/sim/start', methods=['POST'])
+def start_sim():
+    """Body: rate (packets/s per sensor), rates {sensor_id: rate}, speed (0 = max),
+    duration (virtual s), switch_capacity (packets/s), queue_limit, sample_every (s)"""
+    payload, status = g.region.read(start_simulation, request.get_json(silent=True) or {})
+    return jsonify(payload), status
+
+@api.route('/sim/stop', methods=['POST'])
+def stop_sim():
+    return jsonify(g.region.read(stop_simulation))
+
+app.register_blueprint(api, url_prefix='/api')
+app.register_blueprint(api, url_prefix='/api/regions/<region_id>', name='region_api')
+
+@app.route('/api/regions', methods=['GET'])
+def list_regions():
+    result = []
+    for region_id, region in list(regions.items()):
+        snap = region.snapshot()
+        result.append({
+            'id': region_id,
+            'worker': getattr(region, 'pid', None),
+            'intent': snap['current_intent'],
+            'failed_switches': [sw_id for sw_id, sw in snap['switches'].items() if sw['status'] != 'active'],
+            'packet_stats': snap['packet_stats']
+        })
+    return jsonify(result)
+
+@app.route('/api/regions', methods=['POST'])
+def add_region():
+    region_id = str((request.get_json(silent=True) or {}).get('id', ''))
+    if not region_id or not region_id.replace('-', '').replace('_', '').isalnum():
+        return jsonify({'error': 'Region id must be letters, digits, - or _'}), 400
+    region = create_region(region_id)
+    if region is None:
+        return jsonify({'error': 'Region already exists'}), 409
+    return jsonify({'id': region_id, 'room': region.room, 'worker': getattr(region, 'pid', None)}), 201
+
+# WebSocket - each client sits in its region's room (?region=<id> on connect, or join_region).
+# subscribe moves it into '<region room>/<event>' rooms instead, or one room per zone, gateway
+# or sensor filter ('<region room>/new_packet/zone:fire') for the FILTERABLE events. A filtered
+# state_patch keeps only the switches, links, gateways, routes and sensors of those topics
+SUBSCRIBABLE = ('state_patch', 'new_packet', 'event_log', 'packet_stats', 'display_update',
+                'simulation_reset', 'sim_stats')
+FILTERABLE = ('state_patch', 'new_packet', 'event_log')
+SUBSCRIPTION_FILTERS = {'zones': 'zone', 'gateways': 'gateway', 'sensors': 'sensor'}
+client_regions = {}
+client_subscriptions = {}  # sid -> (spec, rooms)
+
+def subscription_rooms(region, spec):
+    """Rooms for {'events': [...], 'zones': [...], 'gateways': [...], 'sensors': [...]};
+    the region room itself for an empty spec. ValueError on an unknown event"""
+    spec = spec or {}
+    unknown = set(spec.get('events') or ()) - set(SUBSCRIBABLE)
+    if unknown:
+        raise ValueError(f'Unknown events: {", ".join(sorted(unknown))}')
+    topics = [f'{dim}:{value}' for key, dim in SUBSCRIPTION_FILTERS.items() for value in spec.get(key) or ()]
+    if not topics and not spec.get('events'):
+        return {region.room}
+    rooms = set()
+    for event in spec.get('events') or SUBSCRIBABLE:
+        if topics and event in FILTERABLE:
+            rooms.update(f'{region.room}/{event}/{topic}' for topic in topics)
+        else:
+            rooms.add(f'{region.room}/{event}')
+    return rooms
+
+def subscribe_client(region, sid, rooms):
+    region.broadcaster.subscribe(sid, rooms)
+
+def move_client(old_region, old_rooms, region, rooms):
+    """Leave one set of rooms for another and tell the regions' broadcasters"""
+    for room in old_rooms - rooms:
+        leave_room(room)
+    for room in rooms - old_rooms:
+        join_room(room)
+    if old_region is not None and old_region is not region:
+        old_region.read(subscribe_client, request.sid, ())
+    region.read(subscribe_client, request.sid, rooms)
+
+def enter_region(region_id):
+    region = regions.get(region_id)
+    if region is None:
+        return False
+    old = client_regions.get(request.sid)
+    spec, old_rooms = client_subscriptions.get(request.sid, (None, set()))
+    rooms = subscription_rooms(region, spec)
+    move_client(regions.get(old), old_rooms, region, rooms)
+    client_regions[request.sid] = region_id
+    client_subscriptions[request.sid] = (spec, rooms)
+    emit('topology_data', {**region.read(snapshot_payload), 'region': region_id})
+    return True
+
 @socketio.on('connect')
 def handle_connect():
-    emit('connected', {'message': 'Connected'})
-    emit('topology_data', {
-        'switches': state['switches'],
-        'switch_links': state['switch_links'],
-        'gateways': state['gateways'],
-        'gateway_links': state['gateway_links'],
-        'sensors': state['sensors'],
-        'display': state['display'],
-        'routes': state['routes'],
-        'intent': state['current_intent'],
-        'auto_packets': state['auto_packets'],
-        'packet_stats': state['packet_stats']
-    })
+    region_id = request.args.get('region', DEFAULT_REGION)
+    if region_id not in regions:
+        return False
+    emit('connected', {'message': 'Connected', 'region': region_id, 'codec': frame_codec.describe()})
+    enter_region(region_id)
+
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    region = regions.get(client_regions.pop(request.sid, None))
+    _, rooms = client_subscriptions.pop(request.sid, (None, set()))
+    if region is not None and rooms - {region.room}:
+        region.read(subscribe_client, request.sid, ())
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Only some events of the client's region: {'events': [...], 'zones': [...],
+    'gateways': [...], 'sensors': [...]}; an empty one restores everything"""
+    region = regions[client_regions.get(request.sid, DEFAULT_REGION)]
+    try:
+        rooms = subscription_rooms(region, data)
+    except ValueError as e:
+        emit('subscription_error', {'error': str(e)})
+        return
+    _, old_rooms = client_subscriptions.get(request.sid, (None, set()))
+    move_client(region, old_rooms, region, rooms)
+    client_subscriptions[request.sid] = (data, rooms)
+    emit('subscribed', {'region': region.id, 'rooms': sorted(rooms)})
+
+@socketio.on('join_region')
+def handle_join_region(data):
+    if not enter_region((data or {}).get('region')):
+        emit('region_error', {'error': 'Unknown region', 'region': (data or {}).get('region')})
 
 @socketio.on('request_topology')
-def handle_topology_request():
-    emit('topology_data', {
-        'switches': state['switches'],
-        'switch_links': state['switch_links'],
-        'gateways': state['gateways'],
-        'gateway_links': state['gateway_links'],
-        'sensors': state['sensors'],
-        'display': state['display'],
-        'routes': state['routes'],
-        'intent': state['current_intent'],
-        'auto_packets': state['auto_packets'],
-        'packet_stats': state['packet_stats']
-    })
-
-# Background Threads
-def auto_packet_sender():
-    global packet_counter
-    sensor_ids = list(SENSORS.keys())
-    idx = 0
-    
-    while True:
-        time.sleep(2.5)  # Slower rate
-        if not state['auto_packets']:
-            continue
-        
-        # Round-robin through sensors, prioritize emergencies
-        emergency_sensors = [s for s in sensor_ids if state['sensors'][s]['status'] == 'EMERGENCY']
-        warning_sensors = [s for s in sensor_ids if state['sensors'][s]['status'] == 'WARNING']
-        
-        if emergency_sensors:
-            sensor_id = random.choice(emergency_sensors)
-        elif warning_sensors and random.random() < 0.6:
-            sensor_id = random.choice(warning_sensors)
-        else:
-            sensor_id = sensor_ids[idx % len(sensor_ids)]
-            idx += 1
-        
-        sensor = state['sensors'][sensor_id]
-        gw_id = sensor['gateway']
-        route, err = compute_route(gw_id, sensor['status'])
-        
-        state['packet_stats']['total'] += 1
-        
-        if err:
-            state['packet_stats']['dropped'] += 1
-            socketio.emit('packet_stats', state['packet_stats'])
-            continue
-        
-        state['packet_stats']['forwarded'] += 1
-        state['routes'][gw_id] = route
-        packet_counter += 1
-        
-        # Update display
-        display_data = {
-            'sensor_id': sensor_id,
-            'sensor_name': sensor['name'],
-            'value': sensor['value'],
-            'unit': sensor['unit'],
-            'priority': sensor['status'],
-            'timestamp': get_timestamp()
-        }
-        state['display']['current_data'].insert(0, display_data)
-        state['display']['current_data'] = state['display']['current_data'][:4]
-        
-        packet = {
-            'id': f'pkt_{packet_counter}',
-            'sensor_id': sensor_id,
-            'gateway_id': gw_id,
-            'priority': sensor['status'],
-            'path': route['path'],
-            'data': {'type': sensor['type'], 'value': sensor['value'], 'unit': sensor['unit'], 'sensor_name': sensor['name']},
-            'cost': route['cost'],
-            'timestamp': get_timestamp()
-        }
-        
-        socketio.emit('new_packet', packet)
-        socketio.emit('packet_stats', state['packet_stats'])
-        socketio.emit('display_update', state['display'])
-
-def battery_drain():
-    while True:
-        time.sleep(30)
-        for sw_id, sw in state['switches'].items():
-            if sw['status'] == 'active' and sw['battery'] > 0:
-                drain = 0.5
-                for route in state['routes'].values():
-                    if route and sw_id in route.get('switches_path', []):
-                        drain += 0.3
-                sw['battery'] = max(0, sw['battery'] - drain)
-        socketio.emit('battery_update', {'switches': {k: {'battery': round(v['battery'], 1)} for k, v in state['switches'].items()}})
+def handle_topology_request(data=None):
+    """Clients send their last applied seq; a full snapshot only goes out on a gap"""
+    region_id = client_regions.get(request.sid, DEFAULT_REGION)
+    payload = regions[region_id].read(snapshot_payload)
+    if data and data.get('seq') == payload['seq']:
+        emit('state_in_sync', {'seq': payload['seq']})
+        return
+    emit('topology_data', {**payload, 'region': region_id})
+
+def start_engine():
+    """Start the default region without its background ticks (tooling, tests)"""
+    default_region.start(background=False)
 
 if __name__ == '__main__':
     print("="*50)
     print("SADRN Backend - Optimized")
-    print("  API: http://0.0.0.0:5000")
+    print(f"  API: http://0.0.0.0:{PORT} ({ASYNC_MODE})")
     print("="*50)
     
-    recompute_all_routes()
+    default_region.start()
+    for region_id in INITIAL_REGIONS:
+        create_region(region_id)
+    print(f"  Regions: {', '.join(regions)}" + (f" ({REGION_WORKERS} worker processes)" if REGION_WORKERS else ""))
     
-    threading.Thread(target=auto_packet_sender, daemon=True).start()
-    threading.Thread(target=battery_drain, daemon=True).start()
-    
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
+    if ASYNC_MODE == 'eventlet':
+        socketio.run(app, host='0.0.0.0', port=PORT, debug=False, max_size=MAX_CLIENTS)
+    else:
+        socketio.run(app, host='0.0.0.0', port=PORT, debug=False, allow_unsafe_werkzeug=True)
@@ -0,0 +1,83 @@
+"""
+SADRN Battery Model - linear drain per switch with scheduled threshold crossings
+"""
+import heapq
+import threading
+import time
+
+THRESHOLDS = (40, 20, 15, 0)
+# Routing bands are strict (battery < 40 etc.), so wake just past each threshold
+EDGE = 0.01
+
+
+def project(switch, now):
+    """Battery level of a switch dict at `now` from its (battery, battery_at, drain_rate) line"""
+    level = switch['battery'] - switch.get('drain_rate', 0) * (now - switch.get('battery_at', now))
+    return max(0.0, level)
+
+
+def predict(switch, now):
+    """Seconds until each threshold is reached: 0 if already crossed, None if not draining"""
+    level, rate = project(switch, now), switch.get('drain_rate', 0)
+    eta = {}
+    for threshold in THRESHOLDS:
+        if level <= threshold:
+            eta[threshold] = 0
+        else:
+            eta[threshold] = round((level - threshold) / rate, 1) if rate > 0 else None
+    return eta
+
+
+class CrossingScheduler:
+    """Sleeps until the earliest predicted threshold crossing and reports it.
+
+    Each switch has at most one live entry: the time its current line hits the
+    next threshold below it. schedule() is called whenever that line changes
+    (manual level, route load, status); superseded entries are skipped by
+    generation. on_crossing(switch_id) runs on the scheduler thread.
+    """
+
+    def __init__(self, on_crossing):
+        self.on_crossing = on_crossing
+        self.cond = threading.Condition()
+        self.heap = []
+        self.generation = {}
+        self.wakeups = 0
+
+    def schedule(self, switch_id, switch):
+        level, rate = switch['battery'], switch.get('drain_rate', 0)
+        with self.cond:
+            generation = self.generation[switch_id] = self.generation.get(switch_id, 0) + 1
+            target = next((max(t - EDGE, 0) for t in THRESHOLDS if max(t - EDGE, 0) < level), None)
+            if rate > 0 and target is not None:
+                at = switch.get('battery_at', time.time()) + (level - target) / rate
+                heapq.heappush(self.heap, (at, generation, switch_id))
+                self.cond.notify()
+
+    def clear(self):
+        with self.cond:
+            self.heap = []
+            self.generation = {k: v + 1 for k, v in self.generation.items()}
+            self.cond.notify()
+
+    def next_crossing(self, switch_id):
+        """Scheduled wake-up time for a switch, or None"""
+        with self.cond:
+            live = self.generation.get(switch_id)
+            return min((at for at, gen, sw in self.heap if sw == switch_id and gen == live), default=None)
+
+    def _pop_due(self):
+        with self.cond:
+            while True:
+                while self.heap and self.heap[0][1] != self.generation.get(self.heap[0][2]):
+                    heapq.heappop(self.heap)
+                now = time.time()
+                if self.heap and self.heap[0][0] <= now:
+                    return heapq.heappop(self.heap)[2]
+                self.cond.wait(self.heap[0][0] - now if self.heap else None)
+
+    def run(self):
+        while True:
+            switch_id = self._pop_due()
+            self.wakeups += 1
+            self.on_crossing(switch_id)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+SADRN Broadcast Benchmark
+Frames and bytes per second delivered to N Socket.IO clients, per-event emits vs tick coalescing,
+and coalesced to clients that subscribed to part of the traffic (--subscribe, a subscribe payload)
+
+    python benchmarks/bench_broadcast.py --clients 100 --rate 200 --duration 5
+    python benchmarks/bench_broadcast.py --subscribe '{"events": ["new_packet"], "zones": ["flood"]}'
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app as backend
+
+
+def run(clients, rate, duration, tick, subscribe=None):
+    backend.start_engine()
+    backend.broadcaster.tick = tick
+    stop = threading.Event()
+    if tick:
+        def ticker():
+            while not stop.is_set():
+                time.sleep(tick)
+                backend.broadcaster.flush()
+        threading.Thread(target=ticker, daemon=True).start()
+
+    conns = [backend.socketio.test_client(backend.app) for _ in range(clients)]
+    for c in conns:
+        if subscribe:
+            c.emit('subscribe', subscribe)
+        c.get_received()
+    api = backend.app.test_client()
+    sensor_ids = list(backend.SENSORS)
+
+    start = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - start < duration:
+        backend.engine.call(backend.send_auto_packet, sensor_ids[sent % len(sensor_ids)])
+        if sent % 20 == 0:
+            api.put(f'/api/sensors/{sensor_ids[sent % len(sensor_ids)]}', json={'value': sent % 40})
+        sent += 1
+        time.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+    stop.set()
+    if tick:
+        backend.broadcaster.flush()
+    elapsed = time.perf_counter() - start
+
+    frames = nbytes = 0
+    for c in conns:
+        for msg in c.get_received():
+            frames += 1
+            nbytes += len(json.dumps([msg['name']] + msg['args']))
+        c.disconnect()
+    return {'packets': sent, 'frames_per_sec': frames / elapsed, 'bytes_per_sec': nbytes / elapsed,
+            'frames_per_client_sec': frames / elapsed / clients, 'bytes_per_packet': nbytes / max(1, sent) / clients}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN broadcast benchmark')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--rate', type=float, default=200, help='Simulated packets per second')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--tick-ms', type=float, default=50)
+    parser.add_argument('--subscribe', type=json.loads, default={'events': ['new_packet', 'packet_stats'], 'zones': ['fire']},
+                        help='Subscription of the clients in the last run (JSON)')
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.rate:.0f} packets/s, {args.duration:.0f}s")
+    tick = args.tick_ms / 1000
+    for label, tick, subscribe in (('per-event emit', 0, None), (f'coalesced {args.tick_ms:.0f} ms', tick, None),
+                                   ('coalesced, subscribed', tick, args.subscribe)):
+        r = run(args.clients, args.rate, args.duration, tick, subscribe)
+        print(f"  {label:21} frames/s {r['frames_per_sec']:10.0f} | per client {r['frames_per_client_sec']:7.1f}"
+              f" | MB/s {r['bytes_per_sec'] / 1e6:6.2f} | bytes/packet/client {r['bytes_per_packet']:6.0f} | packets {r['packets']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+SADRN Frame Codec Benchmark
+CPU per emitted frame and bytes per frame for the broadcaster's encodings, on batch frames
+recorded from a simulated workload (packets, sensor updates, switch failures):
+
+    json            the frame dict, encoded by python-socketio (the default)
+    msgpack         the frame packed as is
+    msgpack+codes   frame_codec: field names as integer codes (SADRN_FRAME_ENCODING=msgpack)
+
+Socket.IO encodes an emit once for all its recipients, so these are per frame, not per client.
+
+    python benchmarks/bench_codec.py --packets 2000 --repeat 20
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SADRN_BATTERY_DRAIN', '0')
+os.environ['SADRN_FRAME_ENCODING'] = 'msgpack'
+
+import msgpack
+from socketio import packet
+
+import app as backend
+import frame_codec
+
+
+def record_frames(packets):
+    """Batch frames the default region emits while packets and updates flow"""
+    backend.start_engine()
+    frames = []
+    backend.broadcaster.socketio = type('Recorder', (), {'emit': lambda self, event, data=None, **kw: frames.append(data)})()
+    backend.broadcaster.tick = 0.05
+    backend.broadcaster.encode = None
+    api = backend.app.test_client()
+    sensor_ids = list(backend.SENSORS)
+    for i in range(packets):
+        backend.engine.call(backend.send_auto_packet, sensor_ids[i % len(sensor_ids)])
+        if i % 20 == 0:
+            api.put(f'/api/sensors/{sensor_ids[i % len(sensor_ids)]}', json={'value': i * 7 % 100})
+        if i % 100 == 0:
+            api.post(f'/api/switches/s{i // 100 % 6 + 1}/fail')
+        if i % 100 == 50:
+            api.post(f'/api/switches/s{i // 100 % 6 + 1}/restore')
+        if i % 10 == 9:
+            backend.broadcaster.flush()
+    backend.broadcaster.flush()
+    return frames
+
+
+def socketio_bytes(payload):
+    """Encode as python-socketio does for an emit; the bytes that go on the wire"""
+    encoded = packet.Packet(packet.EVENT, data=['batch', payload]).encode()
+    parts = encoded if isinstance(encoded, list) else [encoded]
+    return parts, sum(len(p) if isinstance(p, bytes) else len(p.encode()) for p in parts)
+
+
+ENCODINGS = {
+    'json': lambda frame: frame,
+    'msgpack': lambda frame: msgpack.packb(frame),
+    'msgpack+codes': frame_codec.encode,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN frame codec benchmark')
+    parser.add_argument('--packets', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    frames = record_frames(args.packets)
+    print(f"{len(frames)} frames from {args.packets} packets, {args.repeat} passes")
+    baseline = None
+    for name, encode in ENCODINGS.items():
+        started = time.process_time()
+        for _ in range(args.repeat):
+            for frame in frames:
+                socketio_bytes(encode(frame))
+        cpu = (time.process_time() - started) / (args.repeat * len(frames))
+        size = sum(socketio_bytes(encode(frame))[1] for frame in frames) / len(frames)
+        baseline = baseline or size
+        print(f"  {name:14} {cpu * 1e6:8.1f} us/frame  {size:8.0f} bytes/frame  ({size / baseline:.0%} of json)")
+
+
+if __name__ == '__main__':
+    main()
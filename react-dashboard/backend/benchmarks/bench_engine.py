@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+SADRN State Engine Load Test
+Parallel REST writers and readers plus simulated packets against the single-writer engine.
+Checks that no update is lost and every snapshot is consistent, then reports throughput.
+
+    python benchmarks/bench_engine.py --ops 300 --readers 8 --packets 5000
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SADRN_EVENT_LOG_SIZE', '1000000')
+os.environ.setdefault('SADRN_EMIT_TICK_MS', '0')
+os.environ.setdefault('SADRN_BATTERY_DRAIN', '0')  # levels must read back exactly as written
+import app as backend
+
+
+def switch_writer(switch_id, ops, seed, expected):
+    api = backend.app.test_client()
+    rnd = random.Random(seed)
+    level, critical = 100, 0
+    for _ in range(ops):
+        new = rnd.randint(0, 100)
+        assert api.put(f'/api/switches/{switch_id}/battery', json={'battery': new}).status_code == 200
+        critical += (level >= 20 > new) + (level > 0 >= new)
+        level = new
+    expected['battery'][switch_id] = level
+    expected['critical'][switch_id] = critical
+
+
+def sensor_writer(sensor_id, ops, seed, expected):
+    api = backend.app.test_client()
+    rnd = random.Random(seed)
+    sensor = dict(backend.SENSORS[sensor_id])
+    transitions = 0
+    for _ in range(ops):
+        sensor['value'] = rnd.randint(0, 100)
+        status = backend.classify_sensor_status(sensor)
+        transitions += status != sensor['status']
+        sensor['status'] = status
+        assert api.put(f'/api/sensors/{sensor_id}', json={'value': sensor['value']}).status_code == 200
+    expected['value'][sensor_id] = sensor['value']
+    expected['transitions'][sensor_id] = transitions
+
+
+def reader(stop, reads, errors):
+    api = backend.app.test_client()
+    count = 0
+    while not stop.is_set():
+        stats = api.get('/api/packet_stats').json
+        if stats['forwarded'] + stats['dropped'] != stats['total']:
+            errors.append(f'torn packet_stats {stats}')
+        topo = api.get('/api/topology').json
+        for gw_id, route in topo['routes'].items():
+            if route['path'][1:-1] != route['switches_path']:
+                errors.append(f'torn route {gw_id}')
+        api.get('/api/events?limit=20')
+        count += 3
+    reads.append(count)
+
+
+def packet_source(count):
+    sensor_ids = list(backend.SENSORS)
+    futures = [backend.engine.submit(backend.send_auto_packet, random.choice(sensor_ids)) for _ in range(count)]
+    for f in futures:
+        f.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN state engine load test')
+    parser.add_argument('--ops', type=int, default=300, help='Writes per writer thread')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--packets', type=int, default=5000)
+    args = parser.parse_args()
+
+    backend.start_engine()
+    expected = defaultdict(dict)
+    reads, errors = [], []
+    stop = threading.Event()
+
+    writers = [threading.Thread(target=switch_writer, args=(sw, args.ops, i, expected))
+               for i, sw in enumerate(backend.SWITCHES)]
+    writers += [threading.Thread(target=sensor_writer, args=(sid, args.ops, 100 + i, expected))
+                for i, sid in enumerate(backend.SENSORS)]
+    writers.append(threading.Thread(target=packet_source, args=(args.packets,)))
+    readers = [threading.Thread(target=reader, args=(stop, reads, errors)) for _ in range(args.readers)]
+
+    start = time.perf_counter()
+    for t in writers + readers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    state = backend.engine.state
+    snap = backend.engine.snapshot
+    for sw_id, level in expected['battery'].items():
+        if snap['switches'][sw_id]['battery'] != level:
+            errors.append(f'lost battery write on {sw_id}')
+    for sid, value in expected['value'].items():
+        if snap['sensors'][sid]['value'] != value:
+            errors.append(f'lost sensor write on {sid}')
+    events = state['event_logs'].query(after=0, limit=None)
+    if [e['id'] for e in events] != list(range(1, len(events) + 1)):
+        errors.append('event ids not contiguous')
+    sensor_events = sum(1 for e in events if e['type'] == 'SENSOR')
+    if sensor_events != sum(expected['transitions'].values()):
+        errors.append(f'SENSOR events {sensor_events} != transitions {sum(expected["transitions"].values())}')
+    critical_events = sum(1 for e in events if e['type'] == 'BATTERY')
+    if critical_events != sum(expected['critical'].values()):
+        errors.append(f'BATTERY events {critical_events} != crossings {sum(expected["critical"].values())}')
+    stats = snap['packet_stats']
+    if stats['total'] != args.packets or stats['forwarded'] + stats['dropped'] != stats['total']:
+        errors.append(f'packet_stats {dict(stats)} for {args.packets} packets')
+    for sw_id, gws in state['route_index']['switches'].items():
+        if gws != {g for g, r in state['routes'].items() if sw_id in r['switches_path']}:
+            errors.append(f'route index out of sync for {sw_id}')
+    index = state['status_index']
+    for status in ('NORMAL', 'WARNING', 'EMERGENCY'):
+        for gw_id, gw in state['gateways'].items():
+            actual = sum(1 for sid in gw['sensors'] if state['sensors'][sid]['status'] == status)
+            if index.count(status, gw_id) != actual:
+                errors.append(f'status counter {gw_id}/{status} out of sync')
+    try:
+        snap['switches']['s1']['battery'] = 0
+        errors.append('snapshot is mutable')
+    except TypeError:
+        pass
+
+    writes = args.ops * (len(backend.SWITCHES) + len(backend.SENSORS))
+    print(f"{len(writers) - 1} REST writers x {args.ops} ops, {args.readers} readers, {args.packets} packets in {elapsed:.2f}s")
+    print(f"  writes/s {writes / elapsed:8.0f} | reads/s {sum(reads) / elapsed:8.0f} | "
+          f"engine commands/s {backend.engine.commands_run / elapsed:8.0f} | snapshots {backend.engine.version}")
+    print(f"  {len(errors)} consistency errors")
+    for e in errors[:10]:
+        print(f"    {e}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
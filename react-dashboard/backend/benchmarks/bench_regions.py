@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+SADRN Region Throughput
+Drives N independent regions with parallel battery writers and reports engine commands/s,
+with every region in this process or spread over SADRN_REGION_WORKERS worker processes.
+Worker processes only pay off with a free core per worker.
+
+    python benchmarks/bench_regions.py --regions 4 --ops 300
+    SADRN_REGION_WORKERS=4 python benchmarks/bench_regions.py --regions 4 --ops 300
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SADRN_EMIT_TICK_MS', '0')
+os.environ.setdefault('SADRN_BATTERY_DRAIN', '0')  # levels must read back exactly as written
+
+
+def region_writer(backend, region_id, switch_id, ops, seed, expected):
+    api = backend.app.test_client()
+    rnd = random.Random(seed)
+    level = None
+    for _ in range(ops):
+        level = rnd.randint(0, 100)
+        assert api.put(f'/api/regions/{region_id}/switches/{switch_id}/battery',
+                       json={'battery': level}).status_code == 200
+    expected[region_id, switch_id] = level
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN region throughput')
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=300, help='Writes per switch per region')
+    args = parser.parse_args()
+
+    import app as backend
+    backend.start_engine()
+    region_ids = [f'r{i}' for i in range(args.regions)]
+    for region_id in region_ids:
+        backend.create_region(region_id)
+    switches = list(backend.engine.snapshot['switches'])
+
+    expected = {}
+    threads = [threading.Thread(target=region_writer, args=(backend, region_id, sw_id, args.ops, i, expected))
+               for i, (region_id, sw_id) in enumerate((r, s) for r in region_ids for s in switches)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    errors = 0
+    for region_id in region_ids:
+        snap = backend.regions[region_id].snapshot()
+        errors += sum(snap['switches'][sw_id]['battery'] != expected[region_id, sw_id] for sw_id in switches)
+    writes = len(threads) * args.ops
+    mode = f'{backend.REGION_WORKERS} worker processes' if backend.REGION_WORKERS else 'in-process'
+    print(f"{args.regions} regions ({mode}), {writes} writes in {elapsed:.2f}s on {os.cpu_count()} cores")
+    print(f"  writes/s {writes / elapsed:8.0f} | per region {writes / elapsed / args.regions:8.0f}")
+    print(f"  {errors} lost updates")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
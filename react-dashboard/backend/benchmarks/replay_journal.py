@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+SADRN Journal Replay
+Feeds a recorded journal back into a fresh in-process backend at the recorded pace,
+N times faster or as fast as possible, and reports for every step how long the call
+took, how much route computation it triggered and how many bytes clients were sent.
+
+    SADRN_JOURNAL=/tmp/scenario.jsonl python app.py            # record a session
+    python benchmarks/replay_journal.py /tmp/scenario.jsonl --speed 10
+    python benchmarks/replay_journal.py /tmp/scenario.jsonl --speed 0 --quiet
+"""
+import sys
+import os
+import json
+import time
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.pop('SADRN_JOURNAL', None)  # never journal the replay itself
+os.environ.setdefault('SADRN_BATTERY_DRAIN', '0')  # no drain between steps: runs are repeatable
+import app as backend
+from journal import read_journal
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SADRN journal replay')
+    parser.add_argument('journal', help='JSON-lines journal written with SADRN_JOURNAL')
+    parser.add_argument('--speed', type=float, default=1.0, help='1 = recorded pace, N = N times faster, 0 = max')
+    parser.add_argument('--skip', action='append', default=[], help='Path prefix to leave out (repeatable)')
+    parser.add_argument('--quiet', action='store_true', help='Summary only')
+    args = parser.parse_args()
+
+    entries = [e for e in read_journal(args.journal)
+               if e.get('kind') == 'http' and not any(e['path'].startswith(p) for p in args.skip)]
+    if not entries:
+        sys.exit('journal has no replayable entries')
+
+    backend.start_engine()
+    api = backend.app.test_client()
+    client = backend.socketio.test_client(backend.app)
+    client.get_received()
+
+    mismatches, steps = 0, []
+    t0 = entries[0]['t']
+    wall_start = time.perf_counter()
+    for i, entry in enumerate(entries):
+        if args.speed:
+            delay = wall_start + (entry['t'] - t0) / args.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        routes_before = dict(backend.route_stats)
+        started = time.perf_counter()
+        response = api.open(entry['path'], method=entry['method'], json=entry.get('body'))
+        call_ms = (time.perf_counter() - started) * 1000
+        backend.broadcaster.flush()
+        received = client.get_received()
+
+        step = {
+            'call_ms': call_ms,
+            'routes': backend.route_stats['routes'] - routes_before['routes'],
+            'route_ms': (backend.route_stats['seconds'] - routes_before['seconds']) * 1000,
+            'frames': len(received),
+            'bytes': sum(len(json.dumps([m['name']] + m['args'])) for m in received),
+        }
+        steps.append(step)
+        mismatch = response.status_code != entry.get('status', response.status_code)
+        mismatches += mismatch
+        if not args.quiet:
+            print(f"{i + 1:5} {entry['t'] - t0:+9.2f}s {entry['method']:<5} {entry['path']:<34} "
+                  f"{response.status_code}{'!' if mismatch else ' '} {call_ms:7.2f} ms | "
+                  f"routes {step['routes']:2} in {step['route_ms']:6.3f} ms | "
+                  f"{step['frames']} frames {step['bytes']:6} B")
+    elapsed = time.perf_counter() - wall_start
+
+    recorded = entries[-1]['t'] - t0
+    route_steps = [s['route_ms'] for s in steps if s['routes']]
+    print(f"\n{len(steps)} steps in {elapsed:.2f}s (recorded span {recorded:.2f}s, "
+          f"x{recorded / elapsed if elapsed else 0:.1f}), {mismatches} status mismatches")
+    print(f"  call latency   p50 {percentile([s['call_ms'] for s in steps], 0.5):.2f} ms | "
+          f"p99 {percentile([s['call_ms'] for s in steps], 0.99):.2f} ms")
+    print(f"  route compute  {sum(s['routes'] for s in steps)} routes in {len(route_steps)} steps | "
+          f"p50 {percentile(route_steps, 0.5):.3f} ms | p99 {percentile(route_steps, 0.99):.3f} ms per step")
+    print(f"  emitted        {sum(s['frames'] for s in steps)} frames, {sum(s['bytes'] for s in steps)} B "
+          f"({sum(s['bytes'] for s in steps) / len(steps):.0f} B/step) to one client")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+SADRN Broadcaster - tick-based Socket.IO emission coalescing
+"""
+import threading
+import time
+from collections import defaultdict
+
+
+class Broadcaster:
+    """Collects pending emits and sends them as one 'batch' frame per tick.
+
+    Snapshot-style events (packet_stats, topology_update, ...) are merged so only
+    the latest value of each section goes out; stream events (new_packet,
+    event_log) are appended and delivered in order. Registered sources are built
+    once at flush time for events that were touch()-ed during the tick. Urgent
+    emits flush right away, or through `schedule` when set (the app defers them
+    until the state engine has published its snapshot). With tick=0 every emit
+    goes straight to Socket.IO.
+
+    Frame: {'seq': n, 'ts': epoch, 'updates': {event: payload}, 'events': {event: [payload, ...]}}
+    With a room set, everything goes to that Socket.IO room only.
+
+    Subscribed clients sit in '<room>/<event>' rooms instead, or '<room>/<event>/<topic>'
+    for one topic of a stream event (emit(..., topics=('zone:fire', ...))), or of a
+    registered event with a `select` that cuts its payload down to a set of topics. Clients
+    the app reports with subscribe() get one frame per tick of only what they asked for,
+    built once per distinct subscription, encoded once per distinct subframe and addressed
+    to their sids.
+
+    `encode` (frame_codec.encoder()) turns each frame into bytes once, outside the lock,
+    before it is emitted; a worker-hosted region then forwards bytes, not dicts.
+    """
+
+    def __init__(self, socketio, tick=0.05, event='batch', room=None, encode=None):
+        self.socketio = socketio
+        self.tick = tick
+        self.event = event
+        self.room = room
+        self.encode = encode
+        self.lock = threading.Lock()
+        self.updates = {}
+        self.streams = defaultdict(list)
+        self.stream_topics = defaultdict(list)
+        self.subscriptions = {}  # sid -> subscription rooms
+        self.profiles = {}  # subscription rooms -> sids
+        self.sources = {}
+        self.selects = {}
+        self.dirty = set()
+        self.schedule = None
+        self.seq = 0
+        self.frames_sent = 0
+
+    def emit(self, event, payload, append=False, urgent=False, topics=()):
+        if not self.tick:
+            self.socketio.emit(event, payload, to=[self.room, *self.subscribers(event, topics)])
+            self.frames_sent += 1
+            return
+        with self.lock:
+            if append:
+                self.streams[event].append(payload)
+                self.stream_topics[event].append(topics)
+            elif isinstance(payload, dict) and isinstance(self.updates.get(event), dict):
+                self.updates[event].update(payload)
+            else:
+                self.updates[event] = dict(payload) if isinstance(payload, dict) else payload
+        if urgent:
+            self.request_flush()
+
+    def request_flush(self):
+        if self.schedule:
+            self.schedule(self.flush)
+        else:
+            self.flush()
+
+    def register(self, event, build, select=None):
+        """Register a payload builder for an event; build() may return None to skip.
+        select(payload, topics) gives topic-filtered subscribers their part of it"""
+        self.sources[event] = build
+        if select:
+            self.selects[event] = select
+
+    def touch(self, event, urgent=False):
+        """Mark a registered event as changed so its payload is built on the next flush"""
+        with self.lock:
+            self.dirty.add(event)
+        if urgent or not self.tick:
+            self.request_flush()
+
+    def subscribe(self, sid, rooms=()):
+        """Record a client's subscription rooms; none (or the main room) is everything"""
+        rooms = frozenset(room for room in rooms if room != self.room)
+        with self.lock:
+            if rooms:
+                self.subscriptions[sid] = rooms
+            else:
+                self.subscriptions.pop(sid, None)
+            self.profiles = {}
+            for client, client_rooms in self.subscriptions.items():
+                self.profiles.setdefault(client_rooms, []).append(client)
+
+    def subscribers(self, event, topics=()):
+        """Occupied subscription rooms for an event with these topics"""
+        rooms = (f'{self.room}/{event}', *(f'{self.room}/{event}/{topic}' for topic in topics))
+        return [room for room in rooms if any(room in profile for profile in self.profiles)]
+
+    def flush(self):
+        with self.lock:
+            for event in self.dirty:
+                payload = self.sources[event]()
+                if payload is not None:
+                    self.updates[event] = payload
+            self.dirty = set()
+            updates, streams, topics = self.updates, self.streams, self.stream_topics
+            self.updates, self.streams, self.stream_topics = {}, defaultdict(list), defaultdict(list)
+            if not updates and not streams:
+                return None
+            if self.tick:
+                self.seq += 1
+                frame = {'seq': self.seq, 'ts': time.time(), 'updates': updates, 'events': dict(streams)}
+                subframes = self.subframes(frame, topics) if self.profiles else []
+        if not self.tick:
+            for event, payload in updates.items():
+                self.emit(event, payload)
+                for rooms, sids in list(self.profiles.items()):
+                    if f'{self.room}/{event}' not in rooms:
+                        picked = self.pick(rooms, event, payload)
+                        if picked is not None:
+                            self.socketio.emit(event, picked, to=sids)
+            return None
+        encode = self.encode or (lambda frame: frame)
+        self.socketio.emit(self.event, encode(frame), to=self.room)
+        for sids, subframe in subframes:
+            self.socketio.emit(self.event, encode(subframe), to=sids)
+        self.frames_sent += 1 + len(subframes)
+        return frame
+
+    def subframes(self, frame, topics):
+        """[(sids, frame of what they subscribed to)], one per distinct subframe: subscriptions
+        that pick the same updates and events this tick share one, so it is encoded once"""
+        subframes = []
+        for rooms, sids in self.profiles.items():
+            updates = {}
+            for event, payload in frame['updates'].items():
+                picked = self.pick(rooms, event, payload)
+                if picked is not None:
+                    updates[event] = picked
+            events = {}
+            for event, payloads in frame['events'].items():
+                whole = f'{self.room}/{event}' in rooms
+                picked = [payload for payload, item_topics in zip(payloads, topics[event])
+                          if whole or any(f'{self.room}/{event}/{topic}' in rooms for topic in item_topics)]
+                if picked:
+                    events[event] = picked
+            if not updates and not events:
+                continue
+            for shared, subframe in subframes:
+                if subframe['updates'] == updates and subframe['events'] == events:
+                    shared.extend(sids)
+                    break
+            else:
+                subframes.append((list(sids), {'seq': frame['seq'], 'ts': frame['ts'], 'updates': updates,
+                                               'events': events}))
+        return subframes
+
+    def pick(self, rooms, event, payload):
+        """A subscription's part of an update event: all of it, what its topic rooms select,
+        or None"""
+        if f'{self.room}/{event}' in rooms:
+            return payload
+        select = self.selects.get(event)
+        prefix = f'{self.room}/{event}/'
+        topics = {room[len(prefix):] for room in rooms if room.startswith(prefix)}
+        return select(payload, topics) if select and topics else None
+
+    def run(self):
+        """Background loop; start with socketio.start_background_task(broadcaster.run)"""
+        while self.tick:
+            self.socketio.sleep(self.tick)
+            self.flush()
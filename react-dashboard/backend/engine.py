@@ -0,0 +1,122 @@
+"""
+SADRN State Engine - single-writer command queue with immutable snapshots
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+MAX_BATCH = 64
+
+
+class FrozenDict(dict):
+    """Read-only dict; still a dict for jsonify/json.dumps"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('state snapshots are read-only')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def assoc(frozen, key, value):
+    """Copy of a frozen dict with one key set; every other value is shared, not copied"""
+    return FrozenDict({**frozen, key: value})
+
+
+class StateEngine:
+    """Owns a state dict and applies every mutation on one thread.
+
+    Commands are plain functions called as fn(state, *args). The engine drains
+    whatever is queued (up to MAX_BATCH), publishes one frozen snapshot of
+    `snapshot_keys`, runs after_commit() callbacks and only then resolves the
+    callers' futures, so a caller always reads its own write from `snapshot`.
+    """
+
+    def __init__(self, state, snapshot_keys):
+        self.state = state
+        self.snapshot_keys = snapshot_keys
+        self.commands = queue.Queue()
+        self.snapshot = self.freeze_state()
+        self.version = 0
+        self.commands_run = 0
+        self.callbacks = []
+        self.thread = None
+        self.start_lock = threading.Lock()
+
+    def freeze_state(self):
+        return freeze({k: self.state[k] for k in self.snapshot_keys})
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True, name='state-engine')
+                self.thread.start()
+
+    def on_engine_thread(self):
+        return threading.current_thread() is self.thread
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a command; returns a Future with its result"""
+        future = Future()
+        if self.on_engine_thread():
+            # Nested command: we already hold the state, run it in place
+            future.set_result(fn(self.state, *args, **kwargs))
+            return future
+        if self.thread is None:
+            self.start()
+        self.commands.put((fn, args, kwargs, future))
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def after_commit(self, fn):
+        """Run fn on the engine thread once the current batch's snapshot is published"""
+        if self.on_engine_thread():
+            self.callbacks.append(fn)
+        else:
+            fn()
+
+    def run(self):
+        while True:
+            batch = [self.commands.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.commands.get_nowait())
+                except queue.Empty:
+                    break
+
+            results = []
+            for fn, args, kwargs, future in batch:
+                try:
+                    results.append((future, fn(self.state, *args, **kwargs), None))
+                except Exception as e:
+                    results.append((future, None, e))
+            self.commands_run += len(batch)
+
+            self.snapshot = self.freeze_state()
+            self.version += 1
+
+            while self.callbacks:
+                callbacks, self.callbacks = self.callbacks, []
+                for fn in callbacks:
+                    try:
+                        fn()
+                    except Exception as e:
+                        print(f"[engine] after_commit callback failed: {e}")
+
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,57 @@
+"""
+SADRN Event Store - bounded event log with cursor-based reads
+"""
+import threading
+from collections import deque
+from itertools import islice
+
+
+class EventStore:
+    """Ring buffer of events with monotonically increasing ids.
+
+    Ids keep counting across clear() so client cursors stay valid after a reset.
+    """
+
+    def __init__(self, maxlen=500):
+        self.lock = threading.Lock()
+        self.events = deque(maxlen=maxlen)
+        self.last_id = 0
+
+    def append(self, event):
+        with self.lock:
+            self.last_id += 1
+            event['id'] = self.last_id
+            self.events.append(event)
+        return event
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+
+    def __len__(self):
+        return len(self.events)
+
+    def query(self, after=None, limit=50, types=None, priorities=None):
+        """Return matching events.
+
+        Without a cursor the newest `limit` events come back newest first, which is
+        what the dashboard event log renders. With `after` the events following that
+        id come back oldest first so a client can page forward without gaps.
+        """
+        with self.lock:
+            if after is None:
+                source = reversed(self.events)
+            else:
+                # Ids in the buffer are contiguous, so the cursor maps to an offset
+                first_id = self.last_id - len(self.events) + 1
+                source = islice(self.events, max(0, after + 1 - first_id), None)
+            result = []
+            for event in source:
+                if types and event['type'] not in types:
+                    continue
+                if priorities and event['priority'] not in priorities:
+                    continue
+                result.append(dict(event))
+                if limit is not None and len(result) >= limit:
+                    break
+            return result
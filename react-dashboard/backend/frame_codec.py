@@ -0,0 +1,69 @@
+"""
+SADRN Frame Codec - wire encoding of broadcast frames
+
+json (default): frames are emitted as dicts; python-socketio encodes each emit once for
+all of its recipients.
+msgpack: the broadcaster packs each frame once, with schema field names replaced by
+their position in FIELDS, and emits the bytes as one binary attachment. Clients get
+the field table in the `connected` event's `codec`. Other non-string keys become strings,
+as JSON would make them, so every integer key in a packed frame is a field code.
+"""
+import json
+import os
+
+ENCODING = os.environ.get('SADRN_FRAME_ENCODING', 'json')
+if ENCODING == 'msgpack':
+    import msgpack
+
+# Field names by code. Append only: a client may hold the table from an earlier connect
+FIELDS = (
+    'seq', 'ts', 'updates', 'events', 'priority', 'timestamp', 'value', 'sensor_id', 'sensor_name',
+    'unit', 'id', 'type', 'cost', 'path', 'gateway_id', 'data', 'packet_stats', 'forwarded',
+    'dropped', 'total', 'display_update', 'name', 'ip', 'connected_switches', 'current_data',
+    'new_packet', 'message', 'state_patch', 'base', 'changes', 'removed', 'values', 'status',
+    'event_log', 'routes', 'sensors', 'switches', 'gateways', 'switch_links', 'gateway_links',
+    'battery', 'battery_at', 'intent', 'reason', 'current_intent', 'auto_intent', 'auto_packets',
+    'active_uplink', 'switches_path', 'latency', 'source', 'target', 'bandwidth', 'gateway',
+    'threshold_warning', 'threshold_emergency', 'primary_switch', 'backup_switch',
+    'simulation_reset', 'sim_stats', 'display', 'samples',
+)
+CODES = {name: code for code, name in enumerate(FIELDS)}
+NESTED = (dict, list, tuple)
+
+
+def compact_key(key):
+    return CODES.get(key, key) if isinstance(key, str) else json.dumps(key)
+
+
+def compact(value):
+    """Same structure with known field names as integer codes (entity ids stay strings)"""
+    if isinstance(value, dict):
+        return {compact_key(k): compact(v) if isinstance(v, NESTED) else v for k, v in value.items()}
+    if isinstance(value, NESTED):
+        return [compact(v) if isinstance(v, NESTED) else v for v in value]
+    return value
+
+
+def expand(value):
+    if isinstance(value, dict):
+        return {FIELDS[k] if isinstance(k, int) else k: expand(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [expand(v) for v in value]
+    return value
+
+
+def encode(frame):
+    return msgpack.packb(compact(frame))
+
+
+def decode(data):
+    return expand(msgpack.unpackb(data, strict_map_key=False))
+
+
+def encoder():
+    """What the broadcaster applies to each frame before emitting it (None: as is)"""
+    return encode if ENCODING == 'msgpack' else None
+
+
+def describe():
+    return {'encoding': ENCODING, 'fields': FIELDS if ENCODING == 'msgpack' else None}
@@ -0,0 +1,39 @@
+"""
+SADRN Journal - append-only log of state-changing requests for record and replay
+"""
+import json
+import threading
+
+
+class Journal:
+    """JSON-lines file with one entry per state-changing call, in completion order.
+
+    Entry: {'t': epoch s at arrival, 'kind': 'http', 'method': 'PUT', 'path': '/api/...',
+            'body': {...} | null, 'status': 200}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a', buffering=1)
+        self.count = 0
+
+    def record(self, entry):
+        line = json.dumps(entry, separators=(',', ':'))
+        with self.lock:
+            self.file.write(line + '\n')
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_journal(path):
+    """Entries of a journal file; a torn last line (crash mid-write) is skipped"""
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
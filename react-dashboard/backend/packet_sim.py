@@ -0,0 +1,197 @@
+"""
+SADRN Packet Simulator - discrete-event traffic model on a virtual clock
+"""
+import heapq
+import random
+import threading
+import time
+
+# Traffic multiplier per sensor status (scripts/sender.py sends 1/s normal, 5/s emergency)
+STATUS_RATE = {'NORMAL': 1.0, 'WARNING': 2.0, 'EMERGENCY': 5.0}
+DROP_REASONS = ('no_route', 'queue')
+
+
+class PacketSimulator:
+    """Generates per-sensor Poisson traffic and pushes it through the current routes.
+
+    Each sensor's next arrival sits in a heap keyed by virtual time. A packet walks
+    its gateway's route hop by hop: link latency, then FIFO service at each switch
+    (capacity packets/s) with a bounded queue; a full queue drops the packet.
+    Routes, switch state and sensor statuses come from get_snapshot() and are
+    re-read whenever the snapshot object changes.
+
+    speed is virtual seconds per wall second; 0 runs as fast as possible. Every
+    sample_stride-th delivered packet is kept as a sample for the periodic emit.
+    """
+
+    SLICE = 0.05  # virtual seconds per step at max speed
+
+    def __init__(self, get_snapshot, emit=None, rate=100.0, rates=None, speed=0.0, duration=None,
+                 switch_capacity=50000.0, queue_limit=1000, sample_every=0.5, sample_size=20, sample_stride=1000,
+                 seed=None):
+        self.get_snapshot = get_snapshot
+        self.emit = emit
+        self.rate = rate
+        self.rates = rates or {}
+        self.speed = speed
+        self.duration = duration
+        self.service = 1.0 / switch_capacity
+        self.queue_limit = queue_limit
+        self.sample_every = sample_every
+        self.sample_size = sample_size
+        self.sample_stride = sample_stride
+        self.rng = random.Random(seed)
+
+        self.running = False
+        self.thread = None
+        self.snap = None
+        self.now = 0.0
+        self.heap = []
+        self.busy_until = {}
+        self.sensor_rate = {}
+        self.sensor_gateway = {}
+        self.route_hops = {}
+        self.route_cost = {}
+        self.samples = []
+        self.wall_start = None
+        self.wall_elapsed = 0.0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.generated = self.delivered = 0
+        self.dropped = dict.fromkeys(DROP_REASONS, 0)
+        self.latency_sum = self.latency_max = self.cost_sum = 0.0
+        self.by_gateway = {}
+        self.max_queue = {}
+
+    # Topology view
+    def load_snapshot(self, snap):
+        self.snap = snap
+        switches = snap['switches']
+        links = {}
+        for link in snap['switch_links']:
+            if link['status'] == 'active':
+                links[(link['source'], link['target'])] = link['latency'] / 1000.0
+                links[(link['target'], link['source'])] = link['latency'] / 1000.0
+
+        self.route_hops, self.route_cost = {}, {}
+        for gw_id, route in snap['routes'].items():
+            path = route['switches_path']
+            if not all(switches[sw]['status'] == 'active' for sw in path):
+                continue
+            hops = [(path[0], 0.0)]
+            for prev, sw in zip(path, path[1:]):
+                if (prev, sw) not in links:
+                    break
+                hops.append((sw, links[(prev, sw)]))
+            else:
+                self.route_hops[gw_id] = hops
+                self.route_cost[gw_id] = route['cost']
+
+        for sensor_id, sensor in snap['sensors'].items():
+            rate = self.rates.get(sensor_id, self.rate) * STATUS_RATE.get(sensor['status'], 1.0)
+            if sensor_id not in self.sensor_rate and rate > 0:
+                heapq.heappush(self.heap, (self.now + self.rng.expovariate(rate), sensor_id))
+            self.sensor_rate[sensor_id] = rate
+            self.sensor_gateway[sensor_id] = sensor['gateway']
+
+    # Event processing
+    def advance(self, horizon):
+        heap, rng = self.heap, self.rng
+        heappop, heappush = heapq.heappop, heapq.heappush
+        busy_until, service, queue_limit = self.busy_until, self.service, self.queue_limit
+        stride = self.sample_stride
+
+        while heap and heap[0][0] <= horizon:
+            sent_at, sensor_id = heappop(heap)
+            rate = self.sensor_rate[sensor_id]
+            if rate > 0:
+                heappush(heap, (sent_at + rng.expovariate(rate), sensor_id))
+            self.generated += 1
+
+            gw_id = self.sensor_gateway[sensor_id]
+            hops = self.route_hops.get(gw_id)
+            if hops is None:
+                self.dropped['no_route'] += 1
+                continue
+
+            t = sent_at
+            for sw_id, latency in hops:
+                t += latency
+                start = busy_until.get(sw_id, 0.0)
+                if start < t:
+                    start = t
+                queued = (start - t) / service
+                if queued > queue_limit:
+                    self.dropped['queue'] += 1
+                    break
+                if queued > self.max_queue.get(sw_id, 0):
+                    self.max_queue[sw_id] = queued
+                busy_until[sw_id] = t = start + service
+            else:
+                latency = t - sent_at
+                self.delivered += 1
+                self.latency_sum += latency
+                if latency > self.latency_max:
+                    self.latency_max = latency
+                self.cost_sum += self.route_cost[gw_id]
+                self.by_gateway[gw_id] = self.by_gateway.get(gw_id, 0) + 1
+                if self.delivered % stride == 0:
+                    self.samples.append({'sensor_id': sensor_id, 'gateway_id': gw_id, 'sent_at': round(sent_at, 6),
+                                         'latency_ms': round(latency * 1000, 3)})
+        self.now = horizon
+
+    def run(self):
+        self.running = True
+        self.wall_start = time.perf_counter()
+        next_sample = self.wall_start + self.sample_every
+        while self.running:
+            snap = self.get_snapshot()
+            if snap is not self.snap:
+                self.load_snapshot(snap)
+            if self.speed:
+                horizon = (time.perf_counter() - self.wall_start) * self.speed
+            else:
+                horizon = self.now + self.SLICE
+            if self.duration is not None:
+                horizon = min(horizon, self.duration)
+            self.advance(horizon)
+            self.wall_elapsed = time.perf_counter() - self.wall_start
+
+            if self.duration is not None and self.now >= self.duration:
+                self.running = False
+            if self.emit and (not self.running or time.perf_counter() >= next_sample):
+                next_sample = time.perf_counter() + self.sample_every
+                self.emit('sim_stats', {**self.stats(), 'samples': self.samples[-self.sample_size:]})
+                self.samples = []
+            if self.speed and self.running:
+                time.sleep(0.01)
+            else:
+                time.sleep(0)  # yield between slices (green threads under eventlet)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True, name='packet-sim')
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        dropped = sum(self.dropped.values())
+        return {
+            'running': self.running,
+            'virtual_time': round(self.now, 3),
+            'wall_time': round(self.wall_elapsed, 3),
+            'speedup': round(self.now / self.wall_elapsed, 1) if self.wall_elapsed else None,
+            'generated': self.generated,
+            'delivered': self.delivered,
+            'dropped': dropped,
+            'drop_reasons': dict(self.dropped),
+            'sim_packets_per_sec': round(self.generated / self.wall_elapsed) if self.wall_elapsed else 0,
+            'avg_latency_ms': round(self.latency_sum / self.delivered * 1000, 3) if self.delivered else None,
+            'max_latency_ms': round(self.latency_max * 1000, 3),
+            'avg_route_cost': round(self.cost_sum / self.delivered, 3) if self.delivered else None,
+            'delivered_by_gateway': dict(self.by_gateway),
+            'max_queue': {k: round(v, 1) for k, v in self.max_queue.items()}
+        }
@@ -0,0 +1,154 @@
+"""
+SADRN Region Workers - host region partitions in separate processes
+"""
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+REQUEST_THREADS = 32  # per worker; requests block on their region's engine
+
+
+def _green():
+    eventlet = sys.modules.get('eventlet')
+    return bool(eventlet) and eventlet.patcher.is_monkey_patched('thread')
+
+
+def recv(conn):
+    """conn.recv() that yields to the eventlet hub instead of blocking it"""
+    if _green():
+        from eventlet.hubs import trampoline
+        trampoline(conn.fileno(), read=True)
+    return conn.recv()
+
+
+def snapshot_of(region):
+    return region.snapshot()
+
+
+class EmitForwarder:
+    """Stands in for the SocketIO server inside a worker: emits go back to the front process"""
+
+    def __init__(self, send):
+        self.send = send
+
+    def emit(self, event, data=None, to=None, **kwargs):
+        self.send((None, 'emit', (event, data, to)))
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def start_background_task(self, target, *args, **kwargs):
+        thread = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
+
+
+def serve(conn, make_region):
+    """Worker main loop. Requests: (id, op, region_id, fn, args), op in create/call/read.
+
+    Replies (id, result, error) and forwarded emits (None, 'emit', (event, data, room))
+    share the pipe back to the front process.
+    """
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            conn.send(message)
+
+    regions = {}
+    sio = EmitForwarder(send)
+    pool = ThreadPoolExecutor(max_workers=REQUEST_THREADS)
+
+    def handle(req_id, op, region_id, fn, args):
+        try:
+            if op == 'create':
+                region = regions[region_id] = make_region(region_id, sio)
+                region.start()
+                result = os.getpid()
+            elif op == 'call':
+                result = regions[region_id].call(fn, *args)
+            else:
+                result = regions[region_id].read(fn, *args)
+            send((req_id, result, None))
+        except Exception as e:
+            send((req_id, None, e))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        pool.submit(handle, *message)
+
+
+class RegionWorker:
+    """Front-process handle to one worker process hosting any number of regions"""
+
+    def __init__(self, make_region):
+        ctx = multiprocessing.get_context('spawn')
+        self.conn, child = ctx.Pipe()
+        # Eventlet's socketpair hands out non-blocking fds; recv() waits on the hub instead
+        os.set_blocking(self.conn.fileno(), True)
+        os.set_blocking(child.fileno(), True)
+        # Workers serve no sockets: plain threads, whatever the front process runs on
+        mode = os.environ.get('SADRN_ASYNC_MODE')
+        os.environ['SADRN_ASYNC_MODE'] = 'threading'
+        try:
+            self.process = ctx.Process(target=serve, args=(child, make_region), daemon=True)
+            self.process.start()
+        finally:
+            if mode is None:
+                os.environ.pop('SADRN_ASYNC_MODE')
+            else:
+                os.environ['SADRN_ASYNC_MODE'] = mode
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.pending = {}
+
+    def request(self, op, region_id, fn=None, args=()):
+        future = Future()
+        with self.lock:
+            req_id = next(self.ids)
+            self.pending[req_id] = future
+            self.conn.send((req_id, op, region_id, fn, args))
+        return future.result()
+
+    def pump(self, socketio):
+        """Background task: resolve replies and re-emit forwarded frames to their rooms"""
+        while True:
+            try:
+                req_id, result, error = recv(self.conn)
+            except EOFError:
+                return
+            if req_id is None:
+                event, data, room = error
+                socketio.emit(event, data, to=room)
+                continue
+            future = self.pending.pop(req_id)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class RemoteRegion:
+    """Region hosted in a worker process, with the same call/read/snapshot interface"""
+
+    def __init__(self, region_id, worker):
+        self.id = region_id
+        self.room = f'region:{region_id}'
+        self.worker = worker
+        self.pid = worker.request('create', region_id)
+
+    def call(self, fn, *args):
+        return self.worker.request('call', self.id, fn, args)
+
+    def read(self, fn, *args):
+        return self.worker.request('read', self.id, fn, args)
+
+    def snapshot(self):
+        return self.read(snapshot_of)
@@ -0,0 +1,85 @@
+"""
+SADRN State Sync - sequence-numbered delta patches of the topology state
+"""
+import threading
+
+SECTIONS = ('switches', 'switch_links', 'gateways', 'sensors', 'routes')
+VALUES = ('current_intent', 'auto_intent', 'auto_packets')
+
+
+def _keyed(section, data):
+    # Links are a list on the wire; diff them by id
+    if section == 'switch_links':
+        return {link['id']: link for link in data}
+    return data
+
+
+def _copy(data):
+    return {k: dict(v) if isinstance(v, dict) else v for k, v in data.items()}
+
+
+def _diff_section(old, new):
+    changed, removed = {}, [k for k in old if k not in new]
+    for key, entity in new.items():
+        prev = old.get(key)
+        if prev == entity:
+            continue
+        if isinstance(prev, dict) and isinstance(entity, dict):
+            changed[key] = {f: v for f, v in entity.items() if prev.get(f) != v or f not in prev}
+        else:
+            changed[key] = entity
+    return changed, removed
+
+
+class StateVersioner:
+    """Tracks the last published state and turns changes into small patches.
+
+    Patch: {'seq': n, 'base': n - 1,
+            'changes': {section: {id: {field: value}}},   # new entities are sent whole
+            'removed': {section: [id, ...]},
+            'values': {'current_intent': ...}}
+    Clients apply patches whose base matches their seq and otherwise ask for a
+    full snapshot, which carries the seq it corresponds to.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.baseline = {}
+
+    def rebase(self, state):
+        """Take the current state as the new baseline (startup, resets)"""
+        with self.lock:
+            self.seq += 1
+            self.baseline = {s: _copy(_keyed(s, state[s])) for s in SECTIONS}
+            self.baseline['values'] = {k: state[k] for k in VALUES}
+            return self.seq
+
+    def diff(self, state):
+        """Return a patch against the last published state, or None if nothing changed"""
+        with self.lock:
+            return self._diff(state)
+
+    def _diff(self, state):
+        changes, removed = {}, {}
+        for section in SECTIONS:
+            current = _keyed(section, state[section])
+            changed, gone = _diff_section(self.baseline.get(section, {}), current)
+            if changed:
+                changes[section] = changed
+            if gone:
+                removed[section] = gone
+            if changed or gone:
+                self.baseline[section] = _copy(current)
+        old_values = self.baseline.get('values', {})
+        values = {k: state[k] for k in VALUES if old_values.get(k) != state[k] or k not in old_values}
+        if not (changes or removed or values):
+            return None
+        self.baseline['values'] = {k: state[k] for k in VALUES}
+        self.seq += 1
+        patch = {'seq': self.seq, 'base': self.seq - 1, 'changes': changes}
+        if removed:
+            patch['removed'] = removed
+        if values:
+            patch['values'] = values
+        return patch
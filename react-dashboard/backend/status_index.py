@@ -0,0 +1,56 @@
+"""
+SADRN Status Index - incremental sensor status counters
+"""
+import random
+
+STATUSES = ('NORMAL', 'WARNING', 'EMERGENCY')
+
+
+class StatusIndex:
+    """Sensor ids grouped by status, counted per gateway and overall.
+
+    Kept in step with every sensor status change so gateway priority, auto intent
+    and emergency-sensor selection are O(1) regardless of sensor count.
+    """
+
+    def __init__(self, sensors):
+        self.totals = dict.fromkeys(STATUSES, 0)
+        self.by_gateway = {}
+        # Per-status member list + position map: O(1) add, remove and random pick
+        self.members = {status: [] for status in STATUSES}
+        self.position = {}
+        for sensor_id, sensor in sensors.items():
+            self._add(sensor_id, sensor['gateway'], sensor['status'])
+
+    def _add(self, sensor_id, gateway_id, status):
+        self.totals[status] += 1
+        counts = self.by_gateway.setdefault(gateway_id, dict.fromkeys(STATUSES, 0))
+        counts[status] += 1
+        members = self.members[status]
+        self.position[sensor_id] = len(members)
+        members.append(sensor_id)
+
+    def _remove(self, sensor_id, gateway_id, status):
+        self.totals[status] -= 1
+        self.by_gateway[gateway_id][status] -= 1
+        members = self.members[status]
+        idx = self.position.pop(sensor_id)
+        last = members.pop()
+        if last != sensor_id:
+            members[idx] = last
+            self.position[last] = idx
+
+    def update(self, sensor_id, gateway_id, old_status, new_status):
+        if old_status != new_status:
+            self._remove(sensor_id, gateway_id, old_status)
+            self._add(sensor_id, gateway_id, new_status)
+
+    def count(self, status, gateway_id=None):
+        if gateway_id is None:
+            return self.totals[status]
+        return self.by_gateway.get(gateway_id, {}).get(status, 0)
+
+    def choice(self, status):
+        """Random sensor id with this status, or None"""
+        members = self.members[status]
+        return members[random.randrange(len(members))] if members else None
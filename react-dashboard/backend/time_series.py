@@ -0,0 +1,140 @@
+"""
+SADRN Time Series - fixed-capacity per-sensor sample rings with downsampled reads
+"""
+import threading
+from array import array
+
+
+class SeriesRing:
+    """Ring of (timestamp, value) samples in two array('d') buffers, oldest first.
+
+    Timestamps are kept non-decreasing so range lookups are binary searches.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.start = 0
+        self.size = 0
+
+    def append(self, t, value):
+        if self.size:
+            t = max(t, self.ts[(self.start + self.size - 1) % self.capacity])
+        if self.size < self.capacity:
+            idx = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            idx = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.ts[idx] = t
+        self.values[idx] = value
+
+    def _bisect(self, t, right=False):
+        lo, hi = 0, self.size
+        ts, start, cap = self.ts, self.start, self.capacity
+        while lo < hi:
+            mid = (lo + hi) // 2
+            x = ts[(start + mid) % cap]
+            if x < t or (right and x == t):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _copy(self, buf, lo, hi):
+        a, b = (self.start + lo) % self.capacity, (self.start + hi) % self.capacity
+        if lo == hi:
+            return buf[0:0]
+        if a < b:
+            return buf[a:b]
+        return buf[a:] + buf[:b]
+
+    def range(self, t_from=None, t_to=None):
+        """Copies of the timestamps and values with t_from <= t <= t_to"""
+        lo = self._bisect(t_from) if t_from is not None else 0
+        hi = self._bisect(t_to, right=True) if t_to is not None else self.size
+        hi = max(lo, hi)
+        return self._copy(self.ts, lo, hi), self._copy(self.values, lo, hi)
+
+    def bounds(self):
+        if not self.size:
+            return None, None
+        return self.ts[self.start], self.ts[(self.start + self.size - 1) % self.capacity]
+
+
+class TimeSeriesStore:
+    """One SeriesRing per sensor; written by the engine, read by request threads"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.rings = {}
+
+    def append(self, sensor_id, t, value):
+        with self.lock:
+            ring = self.rings.get(sensor_id)
+            if ring is None:
+                ring = self.rings[sensor_id] = SeriesRing(self.capacity)
+            ring.append(t, value)
+
+    def query(self, sensor_id, t_from=None, t_to=None):
+        """(timestamps, values) arrays in range, or None for an unknown sensor"""
+        with self.lock:
+            ring = self.rings.get(sensor_id)
+            if ring is None:
+                return None
+            return ring.range(t_from, t_to)
+
+    def bounds(self, sensor_id):
+        with self.lock:
+            ring = self.rings.get(sensor_id)
+            return ring.bounds() if ring else (None, None)
+
+
+def lttb(ts, values, threshold):
+    """Largest-Triangle-Three-Buckets: keeps the points that preserve the visual shape"""
+    n = len(ts)
+    if threshold >= n or threshold < 3:
+        return list(zip(ts, values))
+    every = (n - 2) / (threshold - 2)
+    out = [(ts[0], values[0])]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle corner
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        count = next_end - next_start
+        avg_t = sum(ts[next_start:next_end]) / count
+        avg_v = sum(values[next_start:next_end]) / count
+
+        at, av = ts[a], values[a]
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((at - avg_t) * (values[j] - av) - (at - ts[j]) * (avg_v - av))
+            if area > best_area:
+                best, best_area = j, area
+        out.append((ts[best], values[best]))
+        a = best
+    out.append((ts[-1], values[-1]))
+    return out
+
+
+def minmax(ts, values, threshold):
+    """Min and max of each bucket, in time order: keeps every spike"""
+    n = len(ts)
+    buckets = max(1, threshold // 2)
+    if n <= threshold:
+        return list(zip(ts, values))
+    out = []
+    for b in range(buckets):
+        lo, hi = b * n // buckets, (b + 1) * n // buckets
+        chunk = values[lo:hi]
+        i_min = lo + min(range(len(chunk)), key=chunk.__getitem__)
+        i_max = lo + max(range(len(chunk)), key=chunk.__getitem__)
+        for i in sorted({i_min, i_max}):
+            out.append((ts[i], values[i]))
+    return out
+
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax}
@@ -4,6 +4,8 @@ SADRN - Receiver Script for Display Node (h_display)
 Listens for packets from all sensors and provides stats via HTTP
 """
 
+import sys
+import os
 import socket
 import json
 import time
@@ -13,6 +15,8 @@ from datetime import datetime
 from collections import deque
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import socketserver
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.stream_stats import StreamStats
 
 NORMAL_PORT = 5000
 EMERGENCY_PORT = 5001
@@ -28,7 +32,7 @@ class PacketStats:
         self.emergency_by_host = {'h1': 0, 'h2': 0, 'h3': 0}
         self.history = deque(maxlen=MAX_HISTORY)
         self.recent = deque(maxlen=50)
-        self.latencies = deque(maxlen=1000)
+        self.stream = StreamStats()
         self.start_time = datetime.now()
     
     def add(self, host_id, is_emergency, timestamp, data):
@@ -46,9 +50,9 @@ class PacketStats:
             latency = None
             try:
                 latency = (datetime.now() - datetime.fromisoformat(timestamp)).total_seconds() * 1000
-                self.latencies.append(latency)
             except:
                 pass
+            self.stream.record(host_id, latency, is_emergency)
             
             record = {'id': self.total, 'host_id': host_id, 'priority': 'CRITICAL' if is_emergency else 'NORMAL',
                       'recv_time': datetime.now().isoformat(), 'latency_ms': latency, 'data': data}
@@ -56,13 +60,16 @@ class PacketStats:
             self.recent.append(record)
     
     def get_stats(self):
+        stream = self.stream.snapshot()
         with self.lock:
             uptime = (datetime.now() - self.start_time).total_seconds()
             return {
                 'total_packets': self.total, 'normal_packets': self.normal, 'emergency_packets': self.emergency,
                 'packets_by_host': dict(self.by_host), 'emergency_by_host': dict(self.emergency_by_host),
-                'avg_latency_ms': sum(self.latencies)/len(self.latencies) if self.latencies else None,
-                'packets_per_second': self.total / max(1, uptime), 'uptime_seconds': uptime
+                'avg_latency_ms': stream['latency_ms']['mean'],
+                'packets_per_second': stream['rates']['10s'], 'uptime_seconds': uptime,
+                'rates': stream['rates'], 'latency_ms': stream['latency_ms'],
+                'recent_latency_ms': stream['recent_latency_ms'], 'hosts': stream['hosts']
             }
     
     def get_recent(self, count=20):
@@ -0,0 +1,192 @@
+"""
+SADRN Streaming Statistics
+
+Packet statistics that cost O(1) per packet however long the node runs:
+latency percentiles from a log-bucketed (HDR-style) histogram, sliding-window
+packet rates, and the same broken down per host.
+"""
+
+import math
+import threading
+import time
+from collections import Counter, deque
+
+# Latency histogram: buckets grow by 1% so any percentile is within 1% of the true value
+LATENCY_MIN_MS = 0.001
+BUCKET_GROWTH = 1.01
+PERCENTILES = (50, 95, 99)
+
+# Sliding windows for rates and recent latency (seconds)
+RATE_WINDOWS = (1, 10, 60)
+LATENCY_WINDOW = 60
+LATENCY_SLOT = 10
+
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+
+def bucket_of(value_ms):
+    if value_ms <= LATENCY_MIN_MS:
+        return 0
+    return int(math.log(value_ms / LATENCY_MIN_MS) / _LOG_GROWTH) + 1
+
+
+def bucket_value(bucket):
+    """Upper bound of a bucket, the value reported for samples in it"""
+    return LATENCY_MIN_MS * BUCKET_GROWTH ** bucket
+
+
+class LatencyHistogram:
+    """Counts per log bucket (sparse), plus exact count, sum and max"""
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value_ms):
+        self.buckets[bucket_of(value_ms)] += 1
+        self.count += 1
+        self.sum += value_ms
+        self.max = max(self.max, value_ms)
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, ranks=PERCENTILES):
+        """{'p50': ms, ...}; walks the occupied buckets once"""
+        if not self.count:
+            return {f'p{rank}': None for rank in ranks}
+        result = {}
+        targets = sorted((math.ceil(self.count * rank / 100), rank) for rank in ranks)
+        seen = 0
+        buckets = iter(sorted(self.buckets.items()))
+        for target, rank in targets:
+            while seen < target:
+                bucket, count = next(buckets)
+                seen += count
+            result[f'p{rank}'] = round(min(bucket_value(bucket), self.max), 3)
+        return result
+
+    def summary(self):
+        return {'count': self.count, 'mean': round(self.sum / self.count, 3) if self.count else None,
+                'max': round(self.max, 3) if self.count else None, **self.percentiles()}
+
+
+class WindowedHistogram:
+    """Latency over the last `window` seconds, as rotating `slot`-second histograms"""
+
+    def __init__(self, window=LATENCY_WINDOW, slot=LATENCY_SLOT):
+        self.window = window
+        self.slot = slot
+        self.slots = deque()  # (slot start, LatencyHistogram)
+
+    def record(self, value_ms, now):
+        start = now - now % self.slot
+        if not self.slots or self.slots[-1][0] != start:
+            self.slots.append((start, LatencyHistogram()))
+            while self.slots[0][0] <= now - self.window - self.slot:
+                self.slots.popleft()
+        self.slots[-1][1].record(value_ms)
+
+    def merged(self, now):
+        total = LatencyHistogram()
+        for start, histogram in self.slots:
+            if start > now - self.window - self.slot:
+                total.merge(histogram)
+        return total
+
+
+class RateMeter:
+    """Events per second over sliding windows, from one counter per whole second"""
+
+    def __init__(self, windows=RATE_WINDOWS):
+        self.windows = windows
+        self.size = max(windows) + 1
+        self.counts = [0] * self.size
+        self.seconds = [0] * self.size
+
+    def record(self, now, n=1):
+        second = int(now)
+        slot = second % self.size
+        if self.seconds[slot] != second:
+            self.seconds[slot] = second
+            self.counts[slot] = 0
+        self.counts[slot] += n
+
+    def rates(self, now):
+        """{'1s': rate, ...} over the last complete seconds (the current one is partial)"""
+        current = int(now)
+        result = {}
+        for window in self.windows:
+            total = 0
+            for second in range(current - window, current):
+                slot = second % self.size
+                if self.seconds[slot] == second:
+                    total += self.counts[slot]
+            result[f'{window}s'] = round(total / window, 3)
+        return result
+
+
+class HostStats:
+    def __init__(self):
+        self.packets = 0
+        self.emergency = 0
+        self.rate = RateMeter()
+        self.latency = LatencyHistogram()
+
+
+class StreamStats:
+    """Totals, rates and latency percentiles of a packet stream, overall and per host"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.total = 0
+        self.emergency = 0
+        self.rate = RateMeter()
+        self.latency = LatencyHistogram()
+        self.recent_latency = WindowedHistogram()
+        self.hosts = {}
+
+    def record(self, host, latency_ms=None, emergency=False, now=None):
+        self.record_batch([(host, latency_ms, emergency)], now)
+
+    def record_batch(self, packets, now=None):
+        """Record (host, latency_ms or None, emergency) tuples under one lock; a latency that
+        is not a non-negative number counts the packet without a latency sample"""
+        now = time.time() if now is None else now
+        with self.lock:
+            for host, latency_ms, emergency in packets:
+                stats = self.hosts.get(host)
+                if stats is None:
+                    stats = self.hosts[host] = HostStats()
+                self.total += 1
+                stats.packets += 1
+                if emergency:
+                    self.emergency += 1
+                    stats.emergency += 1
+                self.rate.record(now)
+                stats.rate.record(now)
+                if isinstance(latency_ms, (int, float)) and 0 <= latency_ms < math.inf:
+                    self.latency.record(latency_ms)
+                    self.recent_latency.record(latency_ms, now)
+                    stats.latency.record(latency_ms)
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            return {
+                'total': self.total,
+                'emergency': self.emergency,
+                'uptime_seconds': round(now - self.started, 3),
+                'rates': self.rate.rates(now),
+                'latency_ms': self.latency.summary(),
+                'recent_latency_ms': self.recent_latency.merged(now).summary(),
+                'hosts': {host: {'packets': stats.packets, 'emergency': stats.emergency,
+                                 'rates': stats.rate.rates(now), 'latency_ms': stats.latency.summary()}
+                          for host, stats in self.hosts.items()}
+            }